@@ -1,5 +1,6 @@
 import { useState } from 'react';
 import { Link } from 'react-router-dom';
+import { waitForTask, describeProgress } from '../tasks';
 
 function Dashboard({ stats, refreshStats }) {
   const [threshold, setThreshold] = useState(0.75);
@@ -21,11 +22,24 @@ function Dashboard({ stats, refreshStats }) {
 
       const data = await response.json();
       
-      if (data.success) {
+      // 409 means a run is already in progress, follow that one
+      if (!data.task_id) {
+        setMessage({ type: 'danger', text: `Error: ${data.message}` });
+        return;
+      }
+
+      const task = await waitForTask(data.task_id, (current) => {
+        setMessage({ type: 'info', text: describeProgress(current) });
+      });
+
+      if (task.status === 'succeeded') {
         setMessage({ type: 'success', text: 'Jobs processed successfully!' });
         refreshStats();
+      } else if (task.status === 'cancelled') {
+        setMessage({ type: 'warning', text: 'Job processing cancelled' });
+        refreshStats();
       } else {
-        setMessage({ type: 'danger', text: `Error: ${data.message}` });
+        setMessage({ type: 'danger', text: `Error: ${task.error}` });
       }
     } catch (error) {
       setMessage({ type: 'danger', text: `Error: ${error.message}` });
@@ -1,9 +1,11 @@
 import { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { waitForTask, cancelTask, describeProgress } from '../tasks';
 
 function InitializeSystem({ refreshStats }) {
   const [initializing, setInitializing] = useState(false);
   const [message, setMessage] = useState(null);
+  const [taskId, setTaskId] = useState(null);
   const navigate = useNavigate();
 
   const handleInitialize = async () => {
@@ -17,17 +19,38 @@ function InitializeSystem({ refreshStats }) {
 
       const data = await response.json();
       
-      if (data.success) {
+      // 409 means an initialization is already running, follow that one
+      if (!data.task_id) {
+        setMessage({ type: 'danger', text: `Error: ${data.message}` });
+        return;
+      }
+
+      setTaskId(data.task_id);
+      const task = await waitForTask(data.task_id, (current) => {
+        setMessage({ type: 'info', text: describeProgress(current) });
+      });
+
+      if (task.status === 'succeeded') {
         setMessage({ type: 'success', text: 'System initialized successfully!' });
         refreshStats();
         setTimeout(() => navigate('/'), 2000); // Redirect to dashboard after 2 seconds
+      } else if (task.status === 'cancelled') {
+        setMessage({ type: 'warning', text: 'Initialization cancelled' });
+        refreshStats();
       } else {
-        setMessage({ type: 'danger', text: `Error: ${data.message}` });
+        setMessage({ type: 'danger', text: `Error: ${task.error}` });
       }
     } catch (error) {
       setMessage({ type: 'danger', text: `Error: ${error.message}` });
     } finally {
       setInitializing(false);
+      setTaskId(null);
+    }
+  };
+
+  const handleCancel = async () => {
+    if (taskId) {
+      await cancelTask(taskId);
     }
   };
 
@@ -67,6 +90,11 @@ function InitializeSystem({ refreshStats }) {
           >
             {initializing ? 'Initializing...' : 'Initialize System'}
           </button>
+          {initializing && taskId && (
+            <button className="btn btn-outline-secondary ms-2" onClick={handleCancel}>
+              Cancel
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -0,0 +1,41 @@
+const API_URL = 'http://localhost:5000/api';
+
+const STAGE_LABELS = {
+  nltk: 'Checking NLTK resources',
+  database: 'Initializing database',
+  job_descriptions: 'Loading job descriptions',
+  cvs: 'Parsing CVs',
+  matching: 'Matching candidates',
+  scheduling: 'Scheduling interviews',
+};
+
+// Poll a background task until it finishes, calling onUpdate with every status
+export async function waitForTask(taskId, onUpdate, interval = 1000) {
+  for (;;) {
+    const response = await fetch(`${API_URL}/tasks/${taskId}`);
+    const data = await response.json();
+    if (!data.success) {
+      throw new Error(data.message);
+    }
+
+    onUpdate(data.task);
+    if (['succeeded', 'failed', 'cancelled'].includes(data.task.status)) {
+      return data.task;
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+}
+
+export async function cancelTask(taskId) {
+  const response = await fetch(`${API_URL}/tasks/${taskId}/cancel`, { method: 'POST' });
+  return response.json();
+}
+
+export function describeProgress(task) {
+  const stage = STAGE_LABELS[task.stage] || 'Starting';
+  if (!task.total) {
+    return `${stage}...`;
+  }
+  const rate = task.throughput ? ` (${task.throughput.toFixed(1)}/s)` : '';
+  return `${stage}: ${task.done} of ${task.total}${rate}`;
+}
@@ -1,15 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import sys
 import os
+import time
 from flask_cors import CORS
 import json
-import sqlite3
+import base64
 import tempfile
 import uuid
 
 # Add the model directory to the path so we can import from it
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'model'))
-from main import JobScreeningSystem, JDSummarizerAgent, CVParsingAgent, CandidateMatcherAgent, InterviewSchedulerAgent
+from main import JobScreeningSystem, JDSummarizerAgent, CVParsingAgent, CandidateMatcherAgent, InterviewSchedulerAgent, get_database, get_job_requirements, read_stats, metrics, MATCH_COMPONENTS, valid_threshold
+from tasks import TaskRunner
 
 app = Flask(__name__)
 CORS(app)
@@ -17,20 +19,163 @@ CORS(app)
 # Initialize the job screening system
 jd_path = os.path.join(os.path.dirname(__file__), '..', 'model', 'Dataset', 'job_description.csv')
 cv_folder_path = os.path.join(os.path.dirname(__file__), '..', 'model', 'Dataset', 'CVs1')
-db_path = os.path.join(os.path.dirname(__file__), '..', 'model', 'recruitment.db')
+db_path = os.environ.get('MATCHMIND_DB_PATH') or os.path.join(os.path.dirname(__file__), '..', 'model', 'recruitment.db')
+
+# Number of processes used to parse CVs during initialization (1 parses in the request worker)
+cv_workers = int(os.environ.get('MATCHMIND_CV_WORKERS', os.cpu_count() or 1))
+cv_timeout = int(os.environ.get('MATCHMIND_CV_TIMEOUT', 60))
+# Number of processes scoring jobs in a matching run (1 scores in the task thread)
+match_workers = int(os.environ.get('MATCHMIND_MATCH_WORKERS', 1))
+# Memory-mapped candidate features matching runs start from, an empty value disables the store
+feature_store_path = os.environ.get('MATCHMIND_FEATURE_STORE', db_path + '.features') or None
 
 # Create system instance
-system = JobScreeningSystem(db_path=db_path)
+system = JobScreeningSystem(db_path=db_path, cv_workers=cv_workers, cv_timeout=cv_timeout,
+                            feature_store_path=feature_store_path, match_workers=match_workers)
+
+# Initialization and matching run in the background, one thread per operation type
+tasks = TaskRunner(max_workers=2)
+
+REQUEST_SECONDS = metrics.histogram(
+    'matchmind_http_request_seconds', "Duration of API requests by route", ('method', 'route', 'status'))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    # Streamed list responses are timed up to their first chunk
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe((request.method, route, str(response.status_code)), time.perf_counter() - started)
+    return response
+
+# Page sizes of the keyset-paginated list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows fetched from the cursor at a time when streaming NDJSON
+STREAM_BATCH_SIZE = 500
+
+JOB_JSON_FIELDS = ['required_skills', 'experience', 'qualifications', 'responsibilities']
+CANDIDATE_JSON_FIELDS = ['skills', 'experience', 'education', 'certifications']
+
+
+def parse_json_fields(row, fields):
+    """dict of a row with the given JSON text columns decoded, empty ones as []"""
+    row_dict = dict(row)
+    for field in fields:
+        row_dict[field] = json.loads(row_dict[field]) if row_dict[field] else []
+    return row_dict
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(token, key_columns):
+    """Key values of an after cursor; ValueError unless it holds one scalar per key column"""
+    key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(key, list) or len(key) != len(key_columns):
+        raise ValueError(f"cursor must hold {len(key_columns)} key values")
+    if not all(value is None or isinstance(value, (str, int, float)) for value in key):
+        raise ValueError("cursor key values must be scalars")
+    return key
+
+
+def is_list_request():
+    """Whether a list endpoint was asked for a page or a stream instead of the whole list"""
+    return any(arg in request.args for arg in ('after', 'limit', 'format'))
+
+
+def keyset_query(select, key_columns, after=None, limit=None):
+    """select restricted to rows after the key values, in key order"""
+    sql, params = select, []
+    if after is not None:
+        sql += f" WHERE ({', '.join(key_columns)}) > ({', '.join('?' * len(key_columns))})"
+        params.extend(after)
+    sql += f" ORDER BY {', '.join(key_columns)}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def stream_rows(cursor, to_dict):
+    """Yield NDJSON lines of a cursor's rows, STREAM_BATCH_SIZE rows in memory at a time"""
+    try:
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            yield ''.join(json.dumps(to_dict(row)) + '\n' for row in rows)
+    finally:
+        cursor.close()
+
+
+def list_page(collection, select, key_columns, to_dict):
+    """One keyset page (?after=&limit=) or an NDJSON stream (?format=ndjson) of a list.
+    
+    Rows are ordered by key_columns, which must end with a unique column and
+    be served by an index. next_after is the opaque cursor of the next page,
+    None on the last one.
+    """
+    try:
+        after = decode_cursor(request.args['after'], key_columns) if request.args.get('after') else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid after cursor'
+        }), 400
+    limit = request.args.get('limit', type=int)
+    cursor = get_database(db_path).connection().cursor()
+    
+    if request.args.get('format') == 'ndjson':
+        cursor.execute(*keyset_query(select, key_columns, after, limit))
+        return Response(stream_rows(cursor, to_dict), mimetype='application/x-ndjson')
+    
+    limit = min(max(1, limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+    # One extra row tells whether there is a next page
+    cursor.execute(*keyset_query(select, key_columns, after, limit + 1))
+    rows = cursor.fetchall()
+    key_names = [column.split('.')[-1] for column in key_columns]
+    next_after = encode_cursor([rows[limit - 1][name] for name in key_names]) if len(rows) > limit else None
+    
+    return jsonify({
+        'success': True,
+        collection: [to_dict(row) for row in rows[:limit]],
+        'next_after': next_after
+    }), 200
+
+def task_started_response(task, created, message):
+    """202 with the new task's id, or 409 with the id of the run still in progress"""
+    if not created:
+        return jsonify({
+            'success': False,
+            'message': f"{task.operation} is already running",
+            'task_id': task.id,
+            'task': task.to_dict()
+        }), 409
+    return jsonify({
+        'success': True,
+        'message': message,
+        'task_id': task.id,
+        'task': task.to_dict()
+    }), 202
 
 @app.route('/api/initialize', methods=['POST'])
 def initialize_system():
-    """Initialize the system with job descriptions and CVs"""
+    """Start initializing the system with job descriptions and CVs, poll /api/tasks/<id> for progress.
+    With refit_tfidf the job description TF-IDF model is refitted and every job re-summarized."""
     try:
-        system.initialize(jd_path, cv_folder_path)
-        return jsonify({
-            'success': True,
-            'message': 'System initialized successfully'
-        }), 200
+        data = request.get_json(silent=True) or {}
+        refit_tfidf = bool(data.get('refit_tfidf', False))
+        task, created = tasks.submit('initialize', system.initialize, jd_path, cv_folder_path,
+                                     refit_tfidf=refit_tfidf)
+        return task_started_response(task, created, 'System initialization started')
     except Exception as e:
         return jsonify({
             'success': False,
@@ -39,23 +184,56 @@ def initialize_system():
 
 @app.route('/api/process-jobs', methods=['POST'])
 def process_jobs():
-    """Process all jobs with the specified threshold"""
+    """Start processing all jobs with the specified threshold, poll /api/tasks/<id> for progress.
+    With incremental only the jobs and candidates added or changed since the last run are matched."""
     try:
         data = request.json
         threshold = data.get('threshold', 0.75)
+        incremental = bool(data.get('incremental', False))
+        if not valid_threshold(threshold):
+            return jsonify({
+                'success': False,
+                'message': 'threshold must be a number between 0 and 1'
+            }), 400
         
-        system.process_all_jobs(matching_threshold=threshold)
-        
-        return jsonify({
-            'success': True,
-            'message': 'Jobs processed successfully'
-        }), 200
+        task, created = tasks.submit('process-jobs', system.process_all_jobs, matching_threshold=threshold,
+                                     incremental=incremental)
+        return task_started_response(task, created, 'Job processing started')
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+def get_task(task_id):
+    """Get the status and progress of a background task"""
+    task = tasks.get(task_id)
+    if task is None:
+        return jsonify({
+            'success': False,
+            'message': 'Task not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'task': task.to_dict()
+    }), 200
+
+@app.route('/api/tasks/<task_id>/cancel', methods=['POST'])
+def cancel_task(task_id):
+    """Ask a background task to stop at its next progress report"""
+    task = tasks.cancel(task_id)
+    if task is None:
+        return jsonify({
+            'success': False,
+            'message': 'Task not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'message': 'Cancellation requested',
+        'task': task.to_dict()
+    }), 200
+
 @app.route('/api/upload-resume', methods=['POST'])
 def upload_resume():
     """Upload a resume and find matching jobs"""
@@ -89,8 +267,8 @@ def upload_resume():
         
         resume_file.save(temp_filepath)
         
-        # Parse the resume
-        cv_agent = CVParsingAgent(db_path)
+        # Parse the resume with the shared agent instead of building one per request
+        cv_agent = system.cv_agent
         cv_text = cv_agent.extract_text_from_pdf(temp_filepath)
         
         # Extract information from the resume
@@ -100,41 +278,24 @@ def upload_resume():
         skills = cv_agent.extract_skills(cv_text)
         certifications = cv_agent.extract_certifications(cv_text)
         
-        # Connect to the database to get all jobs
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-        SELECT id, title, required_skills, experience, qualifications, responsibilities
-        FROM job_descriptions
-        """)
-        
-        jobs = cursor.fetchall()
-        
-        # Calculate match scores for all jobs
-        matcher = CandidateMatcherAgent(db_path)
-        matches = []
-        
-        for job in jobs:
-            # Parse job requirements
-            job_skills = json.loads(job['required_skills']) if job['required_skills'] else []
-            job_experience = json.loads(job['experience']) if job['experience'] else []
-            job_qualifications = json.loads(job['qualifications']) if job['qualifications'] else []
-            
-            # Calculate match score
-            match_score = matcher.calculate_match_score(
-                job_skills, job_experience, job_qualifications,
-                skills, experience, education, certifications
-            )
-            
-            # Add to results if score is reasonable (e.g., > 0.3)
-            if match_score > 0.3:
-                matches.append({
-                    'job_id': job['id'],
-                    'job_title': job['title'],
-                    'match_score': match_score
-                })
+        # Job titles, cached until a job description changes
+        job_titles = {job[0]: job[1] for job in get_job_requirements(db_path)}
+        
+        # Score all jobs, each with its own weights, against the cached job feature matrix;
+        # ?k=N: only the N best jobs, best first
+        matcher = system.matcher_agent
+        k = request.args.get('k', type=int)
+        if k:
+            job_scores = matcher.top_jobs(skills, experience, education, certifications, k)
+        else:
+            job_scores = matcher.job_scores(skills, experience, education, certifications)
+        
+        # Keep the jobs with a reasonable score (e.g., > 0.3)
+        matches = [{
+            'job_id': job_id,
+            'job_title': job_titles.get(job_id),
+            'match_score': match_score
+        } for job_id, match_score in job_scores if match_score > 0.3]
         
         # Clean up the temporary file
         try:
@@ -142,8 +303,6 @@ def upload_resume():
         except:
             pass
         
-        conn.close()
-        
         return jsonify({
             'success': True,
             'message': 'Resume processed successfully',
@@ -166,34 +325,21 @@ def upload_resume():
 
 @app.route('/api/jobs', methods=['GET'])
 def get_jobs():
-    """Get all job descriptions"""
+    """Get all job descriptions, or one page of them with ?after=&limit= or ?format=ndjson"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        select = """
         SELECT id, title, summary, description, required_skills, experience, qualifications, responsibilities
         FROM job_descriptions
-        ORDER BY title
-        """)
+        """
+        if is_list_request():
+            return list_page('jobs', select, ['title', 'id'],
+                             lambda row: parse_json_fields(row, JOB_JSON_FIELDS))
         
-        jobs = cursor.fetchall()
-        conn.close()
+        cursor = get_database(db_path).connection().cursor()
+        cursor.execute(select + " ORDER BY title")
         
         # Convert to list of dicts and parse JSON fields
-        job_list = []
-        for job in jobs:
-            job_dict = dict(job)
-            
-            # Parse JSON fields
-            for field in ['required_skills', 'experience', 'qualifications', 'responsibilities']:
-                if job_dict[field]:
-                    job_dict[field] = json.loads(job_dict[field])
-                else:
-                    job_dict[field] = []
-            
-            job_list.append(job_dict)
+        job_list = [parse_json_fields(job, JOB_JSON_FIELDS) for job in cursor.fetchall()]
         
         return jsonify({
             'success': True,
@@ -207,34 +353,21 @@ def get_jobs():
 
 @app.route('/api/candidates', methods=['GET'])
 def get_candidates():
-    """Get all candidates"""
+    """Get all candidates, or one page of them with ?after=&limit= or ?format=ndjson"""
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        select = """
         SELECT id, name, email, skills, experience, education, certifications
         FROM candidates
-        ORDER BY name
-        """)
+        """
+        if is_list_request():
+            return list_page('candidates', select, ['name', 'id'],
+                             lambda row: parse_json_fields(row, CANDIDATE_JSON_FIELDS))
         
-        candidates = cursor.fetchall()
-        conn.close()
+        cursor = get_database(db_path).connection().cursor()
+        cursor.execute(select + " ORDER BY name")
         
         # Convert to list of dicts and parse JSON fields
-        candidate_list = []
-        for candidate in candidates:
-            candidate_dict = dict(candidate)
-            
-            # Parse JSON fields
-            for field in ['skills', 'experience', 'education', 'certifications']:
-                if candidate_dict[field]:
-                    candidate_dict[field] = json.loads(candidate_dict[field])
-                else:
-                    candidate_dict[field] = []
-            
-            candidate_list.append(candidate_dict)
+        candidate_list = [parse_json_fields(candidate, CANDIDATE_JSON_FIELDS) for candidate in cursor.fetchall()]
         
         return jsonify({
             'success': True,
@@ -280,6 +413,153 @@ def get_shortlisted(job_id):
             'message': str(e)
         }), 500
 
+@app.route('/api/job/<int:job_id>/top-candidates', methods=['GET'])
+def get_top_candidates(job_id):
+    """Get the ?k= (default 10) best candidates for a job, scored on the fly"""
+    try:
+        k = request.args.get('k', 10, type=int)
+        candidates = system.matcher_agent.top_candidates(job_id, k)
+        
+        return jsonify({
+            'success': True,
+            'candidates': candidates
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+# Most thresholds one /api/threshold-sweep request may ask for
+MAX_SWEEP_THRESHOLDS = 100
+
+
+@app.route('/api/rethreshold', methods=['POST'])
+def rethreshold():
+    """Update the shortlists of all jobs, or of job_id, for a new threshold without re-scoring"""
+    try:
+        data = request.json or {}
+        threshold = data.get('threshold')
+        updated = None
+        if isinstance(threshold, (int, float)):
+            updated = system.matcher_agent.rethreshold(threshold, data.get('job_id'))
+        if updated is None:
+            return jsonify({
+                'success': False,
+                'message': 'threshold must be a number between 0 and 1 and job_id, when given, an integer'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': f'{updated} shortlist entries changed',
+            'updated': updated
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/api/threshold-sweep', methods=['GET'])
+def threshold_sweep():
+    """Shortlist sizes for ?thresholds=0.5,0.6,... over all jobs or ?job_id="""
+    try:
+        try:
+            thresholds = [float(value) for value in request.args.get('thresholds', '').split(',') if value.strip()]
+        except ValueError:
+            thresholds = []
+        if not thresholds or len(thresholds) > MAX_SWEEP_THRESHOLDS:
+            return jsonify({
+                'success': False,
+                'message': f'thresholds must be a comma-separated list of 1 to {MAX_SWEEP_THRESHOLDS} numbers'
+            }), 400
+        
+        total, sweep = system.matcher_agent.threshold_sweep(thresholds, request.args.get('job_id', type=int))
+        return jsonify({
+            'success': True,
+            'total': total,
+            'sweep': [{'threshold': threshold, 'shortlisted': count} for threshold, count in sweep]
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+# 400 message of the weights endpoints
+WEIGHTS_MESSAGE = (f'weights must map {", ".join(MATCH_COMPONENTS)} to non-negative numbers and threshold, '
+                   'needed when the job was screened before thresholds were stored, be between 0 and 1')
+
+
+@app.route('/api/job/<int:job_id>/weights', methods=['GET'])
+def get_job_weights(job_id):
+    """Match score component weights of a job"""
+    try:
+        return jsonify({
+            'success': True,
+            'weights': system.matcher_agent.get_job_weights(job_id)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/api/job/<int:job_id>/weights', methods=['PUT'])
+def set_job_weights(job_id):
+    """Store new component weights for a job and rescore its matches from the stored components.
+    The shortlist keeps the job's threshold unless the body has a threshold."""
+    try:
+        data = request.json
+        rescored = None
+        if isinstance(data, dict):
+            weights = dict(data)
+            threshold = weights.pop('threshold', None)
+            rescored = system.matcher_agent.set_job_weights(job_id, weights, threshold)
+        if rescored is None:
+            return jsonify({
+                'success': False,
+                'message': WEIGHTS_MESSAGE
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': f'{rescored} matches rescored',
+            'rescored': rescored,
+            'weights': system.matcher_agent.get_job_weights(job_id)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@app.route('/api/job/<int:job_id>/weights/preview', methods=['POST'])
+def preview_job_weights(job_id):
+    """Shortlist size and ?k= best candidates of a job under other weights, nothing is stored.
+    The shortlist is counted at the job's threshold unless the body has a threshold."""
+    try:
+        data = request.json
+        preview = None
+        if isinstance(data, dict):
+            weights = dict(data)
+            threshold = weights.pop('threshold', None)
+            preview = system.matcher_agent.preview_job_weights(job_id, weights, request.args.get('k', 10, type=int),
+                                                               threshold)
+        if preview is None:
+            return jsonify({
+                'success': False,
+                'message': WEIGHTS_MESSAGE
+            }), 400
+        
+        return jsonify(dict(preview, success=True)), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @app.route('/api/job/<int:job_id>/schedule-interviews', methods=['POST'])
 def schedule_interviews(job_id):
     """Schedule interviews for shortlisted candidates"""
@@ -303,8 +583,17 @@ def schedule_interviews(job_id):
 
 @app.route('/api/matches', methods=['GET'])
 def get_all_matches():
-    """Get all match results"""
+    """Get all match results, or one page of them (by match id) with ?after=&limit= or ?format=ndjson"""
     try:
+        if is_list_request():
+            return list_page('matches', """
+            SELECT m.id, j.title as job_title, c.name as candidate_name, m.match_score, m.shortlisted,
+                   m.interview_sent, m.interview_time
+            FROM match_results m
+            JOIN job_descriptions j ON m.job_id = j.id
+            JOIN candidates c ON m.candidate_id = c.id
+            """, ['m.id'], dict)
+        
         results = system.get_match_results()
         
         return jsonify({
@@ -321,40 +610,14 @@ def get_all_matches():
 def get_stats():
     """Get system statistics"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Count jobs
-        cursor.execute("SELECT COUNT(*) FROM job_descriptions")
-        job_count = cursor.fetchone()[0]
-        
-        # Count candidates
-        cursor.execute("SELECT COUNT(*) FROM candidates")
-        candidate_count = cursor.fetchone()[0]
-        
-        # Count matches
-        cursor.execute("SELECT COUNT(*) FROM match_results")
-        match_count = cursor.fetchone()[0]
+        cursor = get_database(db_path).connection().cursor()
         
-        # Count shortlisted candidates
-        cursor.execute("SELECT COUNT(*) FROM match_results WHERE shortlisted = 1")
-        shortlisted_count = cursor.fetchone()[0]
-        
-        # Count scheduled interviews
-        cursor.execute("SELECT COUNT(*) FROM match_results WHERE interview_sent = 1")
-        interview_count = cursor.fetchone()[0]
-        
-        conn.close()
+        # Counters maintained by triggers, no table is scanned
+        stats = read_stats(cursor)
         
         return jsonify({
             'success': True,
-            'stats': {
-                'jobs': job_count,
-                'candidates': candidate_count,
-                'matches': match_count,
-                'shortlisted': shortlisted_count,
-                'interviews': interview_count
-            }
+            'stats': stats
         }), 200
     except Exception as e:
         return jsonify({
@@ -362,5 +625,11 @@ def get_stats():
             'message': str(e)
         }), 500
 
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Agent, SQLite and request metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
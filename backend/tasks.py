@@ -0,0 +1,137 @@
+"""Background task runner for the long-running API operations.
+
+Tasks run in a thread pool inside the Flask process, no broker is needed.
+Each task passes its progress callback to the operation, which reports
+(stage, done, total) and raises TaskCancelled once a cancel was requested.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from main import TaskCancelled
+
+
+class Task:
+    def __init__(self, operation):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.status = 'queued'  # queued, running, succeeded, failed or cancelled
+        self.stage = None
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._stage_started_at = None
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+    
+    def progress(self, stage, done, total):
+        """Progress callback handed to the operation"""
+        if self._cancel_requested.is_set():
+            raise TaskCancelled(f"Task {self.id} was cancelled")
+        with self._lock:
+            if stage != self.stage:
+                self.stage = stage
+                self._stage_started_at = time.time()
+            self.done = done
+            self.total = total
+    
+    def cancel(self):
+        """Ask the task to stop at its next progress report"""
+        self._cancel_requested.set()
+    
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+    
+    def to_dict(self):
+        with self._lock:
+            end = self.finished_at or time.time()
+            stage_seconds = end - self._stage_started_at if self._stage_started_at else 0.0
+            return {
+                'id': self.id,
+                'operation': self.operation,
+                'status': self.status,
+                'stage': self.stage,
+                'done': self.done,
+                'total': self.total,
+                # Items per second in the current stage
+                'throughput': self.done / stage_seconds if stage_seconds > 0 else 0.0,
+                'elapsed': end - self.started_at if self.started_at else 0.0,
+                'cancel_requested': self._cancel_requested.is_set(),
+                'error': self.error
+            }
+    
+    def _finish(self, status, error=None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+
+
+class TaskRunner:
+    """Runs operations in background threads, at most one run per operation at a time"""
+    
+    def __init__(self, max_workers=2, keep_finished=100):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self._keep_finished = keep_finished
+        self._tasks = OrderedDict()  # id -> Task, oldest first
+        self._active = {}  # operation -> Task
+        self._lock = threading.Lock()
+    
+    def submit(self, operation, fn, *args, **kwargs):
+        """Start fn(*args, progress=task.progress, **kwargs) in the background.
+        
+        Returns (task, created). When a run of the operation is still active,
+        that task is returned with created False and nothing is started.
+        """
+        with self._lock:
+            active = self._active.get(operation)
+            if active is not None:
+                return active, False
+            
+            task = Task(operation)
+            self._tasks[task.id] = task
+            self._active[operation] = task
+            self._forget_finished()
+        
+        self._executor.submit(self._run, task, fn, args, kwargs)
+        return task, True
+    
+    def get(self, task_id):
+        with self._lock:
+            return self._tasks.get(task_id)
+    
+    def cancel(self, task_id):
+        """Request cancellation, returns the task or None if it is unknown"""
+        task = self.get(task_id)
+        if task is not None and not task.is_finished():
+            task.cancel()
+        return task
+    
+    def _run(self, task, fn, args, kwargs):
+        try:
+            if task._cancel_requested.is_set():
+                task._finish('cancelled')
+                return
+            task.status = 'running'
+            task.started_at = time.time()
+            fn(*args, progress=task.progress, **kwargs)
+            task._finish('succeeded')
+        except TaskCancelled:
+            task._finish('cancelled')
+        except Exception as e:
+            print(f"Task {task.operation} ({task.id}) failed: {e}")
+            task._finish('failed', str(e))
+        finally:
+            with self._lock:
+                if self._active.get(task.operation) is task:
+                    del self._active[task.operation]
+    
+    def _forget_finished(self):
+        finished = [task_id for task_id, task in self._tasks.items() if task.is_finished()]
+        for task_id in finished[:max(0, len(finished) - self._keep_finished)]:
+            del self._tasks[task_id]
@@ -0,0 +1,598 @@
+"""Benchmarks for the MatchMind AI job screening system.
+
+Usage:
+    python benchmark.py import-time [--budget SECONDS] [--runs N]
+    python benchmark.py query-plans [--db PATH]
+    python benchmark.py verify-scores (--data DIR | --db PATH)
+    python benchmark.py generate --out DIR [--scale 1k|10k|100k] [--cvs N] [--jobs N] [--seed N]
+    python benchmark.py run --data DIR [--workers N] [--requests N] [--output FILE]
+                            [--baseline FILE] [--tolerance FRACTION]
+
+import-time starts fresh interpreters that only run `import main` and fails
+(exit code 1) when the median import time exceeds the budget or when one of
+the heavy dependencies is imported eagerly.
+
+query-plans runs EXPLAIN QUERY PLAN for the hot-path queries against a freshly
+migrated database (or a copy of --db) and fails when one of them falls back
+to scanning a whole table or sorting its result.
+
+verify-scores loads a generated dataset into a fresh database (or checks a
+copy of --db), gives every other job its own weights and fails when a batch
+engine score differs from calculate_match_score on the JSON columns.
+
+generate writes a deterministic synthetic dataset: a job description CSV and
+one PDF per CV, each generated from the seed and its index alone, so a
+smaller scale is a prefix of a larger one.
+
+run loads a generated dataset into a fresh database and times each stage (JD
+load, CV parsing, matching, interview scheduling) and a set of API endpoints
+through the Flask test client: the read endpoints first, then the writes
+(resume upload, rethreshold, job weights and process-jobs up to the end of
+its task), which only ever change that temporary database. It reports
+throughput, p50/p95 latency and peak RSS, writes them as JSON and, given a
+baseline written by an earlier run, fails when a stage or endpoint got slower
+than the tolerance allows.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(MODEL_DIR), 'backend')
+
+# Cold `import main` budget for autoscaled Flask workers, in seconds
+IMPORT_TIME_BUDGET = 0.25
+
+# Modules that must only be imported by the agent that needs them
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'sklearn', 'PyPDF2', 'nltk']
+
+
+def _run_python(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=MODEL_DIR,
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def measure_import_time(runs=5):
+    """Median seconds `import main` adds to the start-up of a fresh interpreter"""
+    interpreter = statistics.median(_run_python('pass')[0] for _ in range(runs))
+    with_import = statistics.median(_run_python('import main')[0] for _ in range(runs))
+    return max(0.0, with_import - interpreter)
+
+
+def eagerly_imported_modules():
+    """Heavy modules that are already loaded right after `import main`"""
+    _, output = _run_python(
+        'import sys, main; '
+        f'print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))')
+    return output.split()
+
+
+def check_import_time(budget=IMPORT_TIME_BUDGET, runs=5):
+    seconds = measure_import_time(runs)
+    eager = eagerly_imported_modules()
+    print(f"import main: {seconds * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+    if eager:
+        print(f"Imported at import time: {', '.join(eager)}")
+    return seconds <= budget and not eager
+
+
+# Queries that run per job, per request or per ingested file, with sample parameters
+HOT_PATH_QUERIES = {
+    'get_shortlisted_candidates': ("""
+        SELECT c.id, c.name, c.email, m.match_score
+        FROM candidates c
+        JOIN match_results m ON c.id = m.candidate_id
+        WHERE m.job_id = ? AND m.shortlisted = 1 AND m.interview_sent = 0
+        ORDER BY m.match_score DESC
+        """, (1,)),
+    'schedule_interviews': ("""
+        SELECT c.id, c.name, c.email, m.id as match_id
+        FROM candidates c
+        JOIN match_results m ON c.id = m.candidate_id
+        WHERE m.job_id = ? AND m.shortlisted = 1 AND m.interview_sent = 0
+        """, (1,)),
+    'candidate_by_cv_path': ("SELECT id FROM candidates WHERE cv_path = ?", ('cv.pdf',)),
+    'job_by_title': ("SELECT id FROM job_descriptions WHERE title = ?", ('Software Engineer',)),
+    'jobs_page': ("SELECT id, title FROM job_descriptions WHERE (title, id) > (?, ?) ORDER BY title, id LIMIT ?",
+                  ('Software Engineer', 1, 100)),
+    'candidates_page': ("SELECT id, name FROM candidates WHERE (name, id) > (?, ?) ORDER BY name, id LIMIT ?",
+                        ('Jane Doe', 1, 100)),
+    'matches_page': ("SELECT id FROM match_results m WHERE (m.id) > (?) ORDER BY m.id LIMIT ?", (1, 100)),
+    'candidates_with_skill': ("SELECT candidate_id FROM candidate_skills WHERE skill_id = ?", (1,)),
+    'jobs_with_skill': ("SELECT job_id FROM job_skills WHERE skill_id = ?", (1,)),
+    'threshold_sweep': ("SELECT COUNT(*), SUM(match_score >= ?) FROM match_results WHERE job_id = ?", (0.5, 1)),
+    'rethreshold_job': ("""
+        UPDATE match_results
+        SET shortlisted = (match_score >= ?)
+        WHERE job_id = ? AND shortlisted IS NOT (match_score >= ?)
+        """, (0.5, 1, 0.5)),
+}
+
+
+def slow_plan_steps(cursor, sql, params=()):
+    """Plan steps of a query that read a whole table or index, or sort the result"""
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    # Plan rows are (id, parent, notused, detail), a full scan reads "SCAN <table> ..."
+    return [row[3] for row in cursor.fetchall()
+            if row[3].startswith(('SCAN', 'USE TEMP B-TREE'))]
+
+
+def check_query_plans(db_path=None):
+    sys.path.insert(0, MODEL_DIR)
+    import main as model
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plans.db')
+        # Never migrate the caller's database, only a copy of it
+        if db_path:
+            shutil.copyfile(db_path, path)
+        model.init_database(path)
+        cursor = sqlite3.connect(path).cursor()
+        
+        ok = True
+        for name, (sql, params) in HOT_PATH_QUERIES.items():
+            steps = slow_plan_steps(cursor, sql, params)
+            print(f"{name}: {'; '.join(steps) if steps else 'ok'}")
+            ok = ok and not steps
+        cursor.connection.close()
+        model.get_database(path).close()
+    return ok
+
+
+# Non-default weights given to every other job by verify-scores
+VERIFY_WEIGHTS = {'skills': 0.6, 'experience': 0.15, 'education': 0.25, 'certifications': 0.5}
+
+
+def check_batch_scores(data_dir=None, db_path=None):
+    sys.path.insert(0, MODEL_DIR)
+    import main as model
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'verify.db')
+        # Never touch the caller's database, only a copy of it (with its WAL pages)
+        if db_path:
+            source, copy = sqlite3.connect(db_path), sqlite3.connect(path)
+            source.backup(copy)
+            source.close()
+            copy.close()
+        system = model.JobScreeningSystem(path, cv_workers=1)
+        matcher = system.matcher_agent
+        
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            model.init_database(path)
+            if data_dir:
+                model.setup_nltk_resources(download=False)
+                system.jd_agent.load_job_descriptions(os.path.join(data_dir, 'job_descriptions.csv'))
+                system.cv_agent.load_and_parse_cvs(os.path.join(data_dir, 'cvs'), workers=1)
+            cursor = model.get_database(path).connection().cursor()
+            cursor.execute("SELECT id FROM job_descriptions ORDER BY id")
+            job_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT COUNT(*) FROM candidates")
+            n_candidates = cursor.fetchone()[0]
+            for job_id in job_ids[::2]:
+                matcher.set_job_weights(job_id, VERIFY_WEIGHTS, threshold=0.5)
+        
+        mismatches = matcher.verify_batch_scores()
+        print(f"{len(job_ids)} jobs x {n_candidates} candidates: {len(mismatches)} mismatching scores")
+        for job_id, candidate_id, expected, score in mismatches[:10]:
+            print(f"job {job_id}, candidate {candidate_id}: scalar {expected!r}, batch {score!r}")
+        model.get_database(path).close()
+    return not mismatches
+
+
+# Synthetic dataset sizes: scale -> (CVs, job descriptions)
+SCALES = {'1k': (1000, 50), '10k': (10000, 200), '100k': (100000, 1000)}
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Priya', 'Wei', 'Ahmed', 'Fatima', 'Carlos', 'Sofia', 'Kenji', 'Amara', 'Ivan', 'Olga']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Jackson',
+              'Patel', 'Chen', 'Khan', 'Silva', 'Tanaka', 'Okafor', 'Petrov', 'Novak']
+DEGREES = ['Bachelor of Science', 'Bachelor of Arts', 'Master of Science', 'Master of Business Administration',
+           'PhD', 'B.Tech', 'M.Tech']
+UNIVERSITIES = ['University of Texas', 'University of Toronto', 'University of Michigan', 'Institute of Technology',
+                'University of Cambridge', 'College of Engineering', 'University of Melbourne']
+COMPANIES = ['Google', 'Microsoft', 'Amazon', 'Acme Corp', 'Globex', 'Initech', 'Umbrella Health', 'Stark Industries',
+             'Wayne Enterprises', 'Hooli']
+TITLES = ['Software Engineer', 'Senior Developer', 'Data Analyst', 'Lead Engineer', 'Project Manager',
+          'Systems Administrator', 'Junior Developer', 'Product Designer']
+SKILLS = ['python', 'java', 'javascript', 'c++', 'sql', 'nosql', 'aws', 'azure', 'php', 'html', 'css', 'react',
+          'angular', 'vue', 'node', 'django', 'flask', 'spring', 'docker', 'kubernetes', 'git', 'jenkins',
+          'agile', 'scrum', 'tensorflow', 'pytorch', 'machine learning', 'data science', 'nlp', 'linux',
+          'k8s', 'reactjs', 'excel', 'tableau', 'salesforce', 'figma']
+CERTIFICATIONS = ['AWS Certified Solutions Architect professional level.', 'Microsoft Certified Azure Developer.',
+                  'Certified Scrum Master from the Scrum Alliance.', 'PMP certification from PMI.',
+                  'Cisco certified network associate.', 'Oracle certified Java programmer.']
+ROLES = ['Software Engineer', 'Data Scientist', 'Backend Developer', 'Frontend Developer', 'DevOps Engineer',
+         'Machine Learning Engineer', 'Data Analyst', 'Cloud Architect', 'QA Engineer', 'Product Manager']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def pdf_document(lines):
+    """A one-page PDF showing lines of ASCII text in Helvetica, readable by PyPDF2"""
+    def escape(line):
+        return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    content = "BT /F1 11 Tf 50 780 Td 14 TL " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    document = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(document))
+        document += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(document)
+    document += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    document += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    document += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return document
+
+
+def synthetic_cv(seed, index):
+    """Text lines of CV number index, laid out the way CVParsingAgent expects"""
+    rng = random.Random(f"{seed}-cv-{index}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [f"{first} {last}", f"{first.lower()}.{last.lower()}{index}@example.com", "Education"]
+    for _ in range(rng.randint(1, 2)):
+        lines.append(f"{rng.choice(DEGREES)}, {rng.choice(UNIVERSITIES)} {rng.randint(1995, 2022)}")
+    lines.append("Experience")
+    for _ in range(rng.randint(0, 3)):
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} "
+                     f"{rng.choice(MONTHS)} {rng.randint(2005, 2023)} - Present")
+    lines.append("Skills")
+    lines.append(", ".join(rng.sample(SKILLS, rng.randint(3, 8))) + ",")
+    certifications = rng.sample(CERTIFICATIONS, rng.randint(0, 2))
+    if certifications:
+        lines.append("Certifications")
+        lines.extend(certifications)
+    return lines
+
+
+def synthetic_job(seed, index):
+    """(title, description) of job number index, titles are unique"""
+    rng = random.Random(f"{seed}-job-{index}")
+    role = rng.choice(ROLES)
+    skills = rng.sample(SKILLS, rng.randint(4, 8))
+    description = "\n".join([
+        "Description:",
+        f"We are seeking a skilled {role} to design, build and maintain our products. "
+        f"The ideal candidate has hands-on experience with {', '.join(skills[:3])}.",
+        "",
+        "Responsibilities:",
+        f"Develop and operate services using {skills[0]} and {skills[1]}.",
+        "Collaborate with cross-functional teams to deliver features.",
+        "Review code and mentor other engineers.",
+        "Qualifications:",
+        f"{rng.choice(['Bachelor', 'Master'])}'s degree in Computer Science or a related field.",
+        f"{rng.randint(1, 8)}+ years of experience with {', '.join(skills)}.",
+        "Strong problem-solving and communication skills.",
+    ])
+    return f"{role} {index + 1}", description
+
+
+def generate_dataset(out_dir, n_cvs, n_jobs, seed=0):
+    """Write job_descriptions.csv and cvs/*.pdf under out_dir, return their paths"""
+    cv_dir = os.path.join(out_dir, 'cvs')
+    os.makedirs(cv_dir, exist_ok=True)
+    jd_path = os.path.join(out_dir, 'job_descriptions.csv')
+    with open(jd_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Job Title', 'Job Description'])
+        for index in range(n_jobs):
+            writer.writerow(synthetic_job(seed, index))
+    for index in range(n_cvs):
+        with open(os.path.join(cv_dir, f"cv_{index:06d}.pdf"), 'wb') as f:
+            f.write(pdf_document(synthetic_cv(seed, index)))
+    return jd_path, cv_dir
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, None without values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def stage_result(seconds, items, latencies, peak_rss_mb):
+    """Throughput and p50/p95 of the per-item latencies (seconds) of one stage"""
+    p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+    return {
+        'seconds': seconds,
+        'items': items,
+        'throughput': items / seconds if seconds > 0 else None,
+        'p50_ms': p50 * 1000 if p50 is not None else None,
+        'p95_ms': p95 * 1000 if p95 is not None else None,
+        'peak_rss_mb': peak_rss_mb
+    }
+
+
+class ItemClock:
+    """Progress callback recording the time between completed items"""
+    def __init__(self):
+        self.intervals = []
+        self._last = time.perf_counter()
+        self._done = 0
+    
+    def __call__(self, stage, done, total):
+        now = time.perf_counter()
+        if done > self._done:
+            # Several items finishing together share the interval
+            self.intervals.extend([(now - self._last) / (done - self._done)] * (done - self._done))
+            self._done = done
+        self._last = now
+
+
+# Endpoints timed by run; {job_id} is replaced with the first job
+BENCHMARK_ENDPOINTS = [
+    '/api/stats',
+    '/api/jobs',
+    '/api/jobs?limit=100',
+    '/api/candidates?limit=100',
+    '/api/matches?limit=100',
+    '/api/job/{job_id}/matches',
+    '/api/job/{job_id}/shortlisted',
+    '/api/job/{job_id}/top-candidates?k=10',
+]
+
+# Write endpoints timed by run after the read ones: (method, path, JSON bodies sent in turn).
+# upload-resume posts a generated CV instead. Alternating bodies make every request
+# change the shortlists rather than find them up to date.
+BENCHMARK_WRITE_ENDPOINTS = [
+    ('POST', '/api/upload-resume', None),
+    ('POST', '/api/upload-resume?k=10', None),
+    ('POST', '/api/rethreshold', [{'threshold': 0.6}, {'threshold': 0.5}]),
+    ('POST', '/api/job/{job_id}/weights/preview',
+     [{'skills': 0.6, 'experience': 0.2, 'education': 0.2, 'certifications': 1.0}]),
+    ('PUT', '/api/job/{job_id}/weights',
+     [{'skills': 0.6, 'experience': 0.2, 'education': 0.2, 'certifications': 1.0},
+      {'skills': 0.5, 'experience': 0.3, 'education': 0.2, 'certifications': 1.0}]),
+    ('POST', '/api/process-jobs', [{'threshold': 0.5}]),
+]
+
+
+def run_benchmark(data_dir, workers=1, requests=20, threshold=0.5):
+    """Time every stage on the dataset in data_dir with a fresh database, return the results"""
+    sys.path.insert(0, MODEL_DIR)
+    import main as model
+    
+    jd_path = os.path.join(data_dir, 'job_descriptions.csv')
+    cv_dir = os.path.join(data_dir, 'cvs')
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'data': os.path.abspath(data_dir),
+        'workers': workers,
+        'stages': {},
+        'endpoints': {}
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'benchmark.db')
+        model.setup_nltk_resources(download=False)
+        system = model.JobScreeningSystem(db_path, cv_workers=workers, match_workers=workers)
+        cursor = model.get_database(db_path).connection().cursor()
+        
+        # The agents print every job and interview email, which would dominate the timings
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            model.init_database(db_path)
+            
+            started = time.perf_counter()
+            system.jd_agent.load_job_descriptions(jd_path)
+            seconds = time.perf_counter() - started
+            cursor.execute("SELECT id FROM job_descriptions ORDER BY id")
+            job_ids = [row[0] for row in cursor.fetchall()]
+            results['stages']['jd_load'] = stage_result(seconds, len(job_ids), [], model.peak_memory_mb())
+            
+            clock = ItemClock()
+            started = time.perf_counter()
+            system.cv_agent.load_and_parse_cvs(cv_dir, workers=workers, progress=clock)
+            seconds = time.perf_counter() - started
+            cursor.execute("SELECT COUNT(*) FROM candidates")
+            n_candidates = cursor.fetchone()[0]
+            results['stages']['cv_parse'] = stage_result(seconds, n_candidates, clock.intervals,
+                                                         model.peak_memory_mb())
+            
+            clock = ItemClock()
+            started = time.perf_counter()
+            system.matcher_agent.set_threshold(threshold)
+            session = system.matcher_agent.start_session()
+            system.matcher_agent.match_all_jobs(progress=clock, session=session, workers=workers)
+            seconds = time.perf_counter() - started
+            # Latencies are per job scored against every candidate
+            results['stages']['matching'] = stage_result(seconds, len(job_ids), clock.intervals,
+                                                         model.peak_memory_mb())
+            results['stages']['matching']['pairs'] = len(job_ids) * n_candidates
+            
+            latencies = []
+            started = time.perf_counter()
+            for job_id in job_ids:
+                job_started = time.perf_counter()
+                system.scheduler_agent.schedule_interviews(job_id)
+                latencies.append(time.perf_counter() - job_started)
+            seconds = time.perf_counter() - started
+            results['stages']['scheduling'] = stage_result(seconds, len(job_ids), latencies, model.peak_memory_mb())
+        
+        results['endpoints'] = time_endpoints(db_path, job_ids[0] if job_ids else 1, requests, model, workers)
+        results['peak_rss_mb'] = model.peak_memory_mb()
+        model.get_database(db_path).close()
+    return results
+
+
+def time_endpoints(db_path, job_id, requests, model, workers=1):
+    """p50/p95 of every BENCHMARK_ENDPOINTS and BENCHMARK_WRITE_ENDPOINTS request through the Flask test client"""
+    # app.py reads its database path and workers when it is imported
+    os.environ['MATCHMIND_DB_PATH'] = db_path
+    os.environ['MATCHMIND_FEATURE_STORE'] = ''
+    os.environ['MATCHMIND_MATCH_WORKERS'] = str(workers)
+    sys.path.insert(0, BACKEND_DIR)
+    import app as backend
+    client = backend.app.test_client()
+    resume = pdf_document(synthetic_cv(0, 0))
+    
+    endpoints = {}
+    reads = [('GET', path, None) for path in BENCHMARK_ENDPOINTS]
+    for method, template, bodies in reads + BENCHMARK_WRITE_ENDPOINTS:
+        path = template.format(job_id=job_id)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        # process-jobs prints every job and interview email
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for index in range(requests):
+                request_started = time.perf_counter()
+                ok = send_request(client, method, path, bodies[index % len(bodies)] if bodies else None, resume)
+                latencies.append(time.perf_counter() - request_started)
+                errors += not ok
+        result = stage_result(time.perf_counter() - started, requests, latencies, model.peak_memory_mb())
+        result['errors'] = errors
+        endpoints[f"{method} {template}"] = result
+    return endpoints
+
+
+def send_request(client, method, path, body, resume):
+    """Whether one benchmark request succeeded; a started task is polled until it finishes"""
+    if path.startswith('/api/upload-resume'):
+        response = client.open(path, method=method, data={'resume': (io.BytesIO(resume), 'resume.pdf')})
+    else:
+        response = client.open(path, method=method, json=body)
+    # Streamed bodies are only produced while they are read
+    response.get_data()
+    if response.status_code != 202:
+        return response.status_code == 200
+    
+    task_path = f"/api/tasks/{response.get_json()['task_id']}"
+    while True:
+        task = client.get(task_path).get_json()['task']
+        if task['status'] in ('succeeded', 'failed', 'cancelled'):
+            return task['status'] == 'succeeded'
+        time.sleep(0.01)
+
+
+def compare_results(results, baseline, tolerance=0.2):
+    """(name, metric, baseline, current) for every time that grew by more than tolerance"""
+    regressions = []
+    # An endpoint's total time depends on --requests, only its latency is compared
+    for section, metrics in (('stages', ('seconds', 'p95_ms')), ('endpoints', ('p50_ms', 'p95_ms'))):
+        for name, current in results[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            for metric in metrics:
+                if previous.get(metric) and current.get(metric) is not None \
+                        and current[metric] > previous[metric] * (1 + tolerance):
+                    regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'stage':44} {'seconds':>9} {'items':>9} {'items/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8}")
+    for section in ('stages', 'endpoints'):
+        for name, result in results[section].items():
+            print(f"{name:44} {result['seconds']:9.3f} {result['items']:9d} "
+                  f"{_format(result['throughput'], 11, 1)} {_format(result['p50_ms'], 9, 2)} "
+                  f"{_format(result['p95_ms'], 9, 2)} {_format(result['peak_rss_mb'], 8, 1)}")
+
+
+def _format(value, width, decimals):
+    return f"{value:{width}.{decimals}f}" if value is not None else f"{'-':>{width}}"
+
+
+def run_command(data_dir, workers, requests, output=None, baseline_path=None, tolerance=0.2):
+    results = run_benchmark(data_dir, workers, requests)
+    print_results(results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    
+    if not baseline_path:
+        return True
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare_results(results, baseline, tolerance)
+    for name, metric, previous, current in regressions:
+        print(f"REGRESSION {name} {metric}: {previous:.3f} -> {current:.3f}")
+    if not regressions:
+        print(f"No regressions against {baseline_path} (tolerance {tolerance:.0%})")
+    return not regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MatchMind AI benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    import_time = subparsers.add_parser('import-time', help="check the cold import time of main.py")
+    import_time.add_argument('--budget', type=float, default=IMPORT_TIME_BUDGET,
+                             help="maximum median import time in seconds")
+    import_time.add_argument('--runs', type=int, default=5, help="number of interpreters to time")
+    
+    query_plans = subparsers.add_parser('query-plans', help="check that hot-path queries use indexes")
+    query_plans.add_argument('--db', help="check a copy of this database instead of an empty one")
+    
+    verify_scores = subparsers.add_parser('verify-scores', help="check the batch scores against the scalar ones")
+    source = verify_scores.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data', help="directory written by generate to load into a fresh database")
+    source.add_argument('--db', help="check a copy of this database")
+    
+    generate = subparsers.add_parser('generate', help="write a synthetic dataset of PDF CVs and job descriptions")
+    generate.add_argument('--out', required=True, help="directory to write job_descriptions.csv and cvs/ to")
+    generate.add_argument('--scale', choices=list(SCALES), default='1k', help="number of CVs")
+    generate.add_argument('--cvs', type=int, help="number of CVs, overrides --scale")
+    generate.add_argument('--jobs', type=int, help="number of job descriptions, overrides --scale")
+    generate.add_argument('--seed', type=int, default=0, help="seed of the generator")
+    
+    run = subparsers.add_parser('run', help="time every stage and endpoint on a generated dataset")
+    run.add_argument('--data', required=True, help="directory written by generate")
+    run.add_argument('--workers', type=int, default=1, help="CV parsing and matching processes")
+    run.add_argument('--requests', type=int, default=20, help="requests per endpoint")
+    run.add_argument('--output', help="write the results as JSON to this file")
+    run.add_argument('--baseline', help="results of an earlier run to flag regressions against")
+    run.add_argument('--tolerance', type=float, default=0.2,
+                     help="fraction a time may grow over the baseline before it is a regression")
+    
+    args = parser.parse_args()
+    if args.command == 'import-time':
+        ok = check_import_time(args.budget, args.runs)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'query-plans':
+        ok = check_query_plans(args.db)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'verify-scores':
+        ok = check_batch_scores(args.data, args.db)
+        sys.exit(0 if ok else 1)
+    elif args.command == 'generate':
+        n_cvs, n_jobs = SCALES[args.scale]
+        n_cvs = args.cvs if args.cvs is not None else n_cvs
+        n_jobs = args.jobs if args.jobs is not None else n_jobs
+        generate_dataset(args.out, n_cvs, n_jobs, args.seed)
+        print(f"Wrote {n_cvs} CVs and {n_jobs} job descriptions to {args.out}")
+    elif args.command == 'run':
+        ok = run_command(args.data, args.workers, args.requests, args.output, args.baseline, args.tolerance)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
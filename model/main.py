@@ -1,39 +1,443 @@
 import os
-import pandas as pd
+import sys
 import sqlite3
-import PyPDF2
 import re
 import json
+import struct
+import hashlib
+import argparse
+import functools
+import importlib
+import contextlib
+import threading
 import random
+import time
+import multiprocessing
+import multiprocessing.connection
+from collections import deque
 from datetime import datetime, timedelta
-import nltk
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from bisect import bisect_left, bisect_right
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-# Download necessary NLTK resources
 try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('corpora/wordnet')
-    nltk.data.find('corpora/omw-1.4')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-    nltk.download('omw-1.4') 
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access.
+    
+    pandas, scikit-learn, SciPy, PyPDF2 and NLTK take seconds to import, so
+    they are only loaded by the agent that actually needs them.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+sparse = LazyModule('scipy.sparse')
+PyPDF2 = LazyModule('PyPDF2')
+sklearn_text = LazyModule('sklearn.feature_extraction.text')
+sklearn_preprocessing = LazyModule('sklearn.preprocessing')
+nltk_tokenize = LazyModule('nltk.tokenize')
+nltk_corpus = LazyModule('nltk.corpus')
+nltk_stem = LazyModule('nltk.stem')
+
+# NLTK data used by the text preprocessing: resource path -> download name
+NLTK_RESOURCES = {
+    'tokenizers/punkt': 'punkt',
+    'corpora/stopwords': 'stopwords',
+    'corpora/wordnet': 'wordnet',
+    'corpora/omw-1.4': 'omw-1.4'
+}
+
+
+def setup_nltk_resources(download=True):
+    """Make sure the NLTK data is installed, downloading what is missing if allowed
+    
+    Raises LookupError naming the missing resources when they are still not
+    available, e.g. because the machine is offline.
+    """
+    import nltk
+    
+    def missing_resources():
+        missing = []
+        for resource, name in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                missing.append(name)
+        return missing
+    
+    missing = missing_resources()
+    if missing and download:
+        for name in missing:
+            nltk.download(name, quiet=True)
+        missing = missing_resources()
+    
+    if missing:
+        raise LookupError(
+            f"Missing NLTK resources: {', '.join(missing)}. Run 'python main.py setup' "
+            f"with network access, or install them into a directory listed in NLTK_DATA.")
+
+
+# Progress reporting for long-running operations
+class TaskCancelled(BaseException):
+    """Raised by a progress callback to stop the operation that called it.
+    
+    A BaseException like KeyboardInterrupt, so the agents' `except Exception`
+    error handling does not swallow it.
+    """
+
+
+def report_progress(progress, stage, done, total):
+    """Call progress(stage, done, total) if a callback was given"""
+    if progress is not None:
+        progress(stage, done, total)
+
+
+# Prometheus-style metrics, exposed by the backend at /api/metrics
+class Counter:
+    """Monotonically increasing value per tuple of label values"""
+    kind = 'counter'
+    
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        # A counter without labels is reported as 0 before its first increment
+        self._values = {} if labels else {(): 0}
+        self._lock = threading.Lock()
+    
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def samples(self):
+        """(sample name, label pairs, value) for the text exposition format"""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, list(zip(self.labels, label_values)), value) for label_values, value in values]
+
+
+class Histogram:
+    """Observation counts in cumulative buckets plus their sum, per tuple of label values"""
+    kind = 'histogram'
+    
+    def __init__(self, name, help_text, labels=(), buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [count per bucket..., count above the last bucket, sum]
+        self._lock = threading.Lock()
+    
+    def observe(self, label_values, value):
+        # Buckets are upper bounds, a value equal to a bound falls into it
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[bucket] += 1
+            series[-1] += value
+    
+    def samples(self):
+        """(sample name, label pairs, value) for the text exposition format"""
+        with self._lock:
+            series = sorted((label_values, list(counts)) for label_values, counts in self._series.items())
+        samples = []
+        for label_values, counts in series:
+            labels = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels + [('le', bound)], cumulative))
+            samples.append((f"{self.name}_sum", labels, counts[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format"""
+    def __init__(self):
+        self._metrics = []
+    
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(self, name, help_text, labels=(), **kwargs):
+        metric = Histogram(name, help_text, labels, **kwargs)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                label_text = ','.join(f'{label}="{self._label_value(value)}"' for label, value in labels)
+                lines.append(f"{name}{{{label_text}}} {self._sample_value(value)}" if labels
+                             else f"{name} {self._sample_value(value)}")
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _label_value(value):
+        if isinstance(value, float):
+            return MetricsRegistry._sample_value(value)
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    
+    @staticmethod
+    def _sample_value(value):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
+AGENT_SECONDS = metrics.histogram(
+    'matchmind_agent_seconds', "Duration of agent operations", ('agent', 'operation'),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+AGENT_ITEMS = metrics.counter(
+    'matchmind_agent_items_total', "Items processed by agents", ('agent', 'item'))
+PDF_BYTES = metrics.counter(
+    'matchmind_pdf_bytes_total', "Size of the CV PDF files parsed")
+SQLITE_SECONDS = metrics.histogram(
+    'matchmind_sqlite_statement_seconds', "Execution time of SQLite statements by verb and table", ('statement',),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+
+
+def timed(agent, operation=None):
+    """Decorator recording the duration of every call in AGENT_SECONDS"""
+    def decorate(function):
+        label_values = (agent, operation or function.__name__)
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                AGENT_SECONDS.observe(label_values, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_label(sql):
+    """Statement verb and first table, such as 'select candidates', to keep the label set small"""
+    verb = re.match(r'\s*(\w*)', sql).group(1).lower() or 'unknown'
+    table = re.search(r'\b(?:FROM|INTO|UPDATE|TABLE|EXISTS)\s+(\w+)', sql, re.IGNORECASE)
+    return f"{verb} {table.group(1).lower()}" if table else verb
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor recording the time of every execute in SQLITE_SECONDS (fetching is not included)"""
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            SQLITE_SECONDS.observe((statement_label(sql),), time.perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            SQLITE_SECONDS.observe((statement_label(sql),), time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including the ones of execute(), are TimedCursors"""
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Shared SQLite connections
+class Database:
+    """Per-thread SQLite connections to one database file.
+    
+    Every thread reuses a single connection instead of opening one per call.
+    Connections run in WAL mode, so readers never wait for a long matching
+    transaction and a writer only waits (up to busy_timeout) for another
+    writer. Use transaction() for writes so a failure never leaves a
+    transaction open on the shared connection.
+    """
+    PRAGMAS = [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA busy_timeout = 30000",
+        "PRAGMA cache_size = -65536",  # 64 MB page cache
+        "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+        "PRAGMA temp_store = MEMORY"
+    ]
+    
+    def __init__(self, db_path='recruitment.db'):
+        self.db_path = db_path
+        self._local = threading.local()
+    
+    def connection(self):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        # A forked child must not reuse its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, factory=TimedConnection)
+            conn.row_factory = sqlite3.Row
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    @contextlib.contextmanager
+    def transaction(self):
+        """This thread's connection, committed on success and rolled back on error"""
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path='recruitment.db'):
+    """The process-wide Database for db_path, shared by the agents and the backend"""
+    key = os.path.abspath(db_path)
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = Database(db_path)
+        return _databases[key]
+
+
+_generation_cache = {}  # (name, abspath) -> (generation, value)
+_generation_cache_lock = threading.Lock()
+
+
+def cached_by_generation(name, db_path, table, load):
+    """load(cursor), cached per process until the generation of table changes.
+    
+    A hit costs one primary key read. Callers must not modify the cached value.
+    """
+    key = (name, os.path.abspath(db_path))
+    cursor = get_database(db_path).connection().cursor()
+    # Read the generation before loading: a write in between only causes one extra reload
+    generation = table_generation(cursor, table)
+    with _generation_cache_lock:
+        cached = _generation_cache.get(key)
+    if generation is not None and cached and cached[0] == generation:
+        return cached[1]
+    
+    value = load(cursor)
+    if generation is not None:
+        with _generation_cache_lock:
+            _generation_cache[key] = (generation, value)
+    return value
+
+
+def get_job_requirements(db_path='recruitment.db'):
+    """(id, title, skills, experience, qualifications) of every job with the JSON columns parsed,
+    cached until job_descriptions changes"""
+    return cached_by_generation('job_requirements', db_path, 'job_descriptions', _load_job_requirements)
+
+
+def _load_job_requirements(cursor):
+    cursor.execute("""
+    SELECT id, title, required_skills, experience, qualifications
+    FROM job_descriptions
+    """)
+    return [
+        (row['id'], row['title'],
+         json.loads(row['required_skills']) if row['required_skills'] else [],
+         json.loads(row['experience']) if row['experience'] else [],
+         json.loads(row['qualifications']) if row['qualifications'] else [])
+        for row in cursor.fetchall()
+    ]
+
+
+def get_job_features(db_path='recruitment.db'):
+    """JobFeatureMatrix of every job, cached until job_descriptions changes"""
+    return cached_by_generation(
+        'job_features', db_path, 'job_descriptions',
+        lambda cursor: JobFeatureMatrix([(job[0], job[2], job[4]) for job in get_job_requirements(db_path)]))
+
 
 # Initialize database
-def init_database():
-    conn = sqlite3.connect('recruitment.db')
-    cursor = conn.cursor()
+def init_database(db_path='recruitment.db'):
+    """Create the database or upgrade an existing one to the current schema"""
+    with get_database(db_path).transaction() as conn:
+        migrate_database(conn.cursor())
+
+
+def migrate_database(cursor):
+    """Run the migrations the database has not seen yet, tracked in PRAGMA user_version
     
-    # Create tables
+    Every step runs in its own BEGIN IMMEDIATE transaction and re-reads
+    user_version once it holds the write lock, so a process that waited for
+    another one upgrading the same file skips the steps already applied
+    instead of failing on them. Inside a transaction the caller already
+    opened, the steps run in that transaction.
+    """
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= SCHEMA_VERSION:
+        return 0
+    
+    conn = cursor.connection
+    own_transaction = not conn.in_transaction
+    applied = 0
+    while True:
+        # DDL does not open a transaction by itself, take the write lock before reading the version
+        if own_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if version < SCHEMA_VERSION:
+                MIGRATIONS[version](cursor)
+                cursor.execute(f"PRAGMA user_version = {version + 1}")
+        except BaseException:
+            if own_transaction:
+                conn.rollback()
+            raise
+        if own_transaction:
+            conn.commit()
+        if version >= SCHEMA_VERSION:
+            return applied
+        applied += 1
+
+
+def create_base_tables(cursor):
+    """Tables of the original schema"""
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS job_descriptions (
         id INTEGER PRIMARY KEY,
@@ -74,110 +478,761 @@ def init_database():
         FOREIGN KEY (candidate_id) REFERENCES candidates(id)
     )
     ''')
+
+
+def migrate_match_results(cursor):
+    """Make (job_id, candidate_id) unique in match_results so results can be upserted"""
+    cursor.execute("""
+    SELECT 1 FROM sqlite_master
+    WHERE type = 'index' AND name = 'idx_match_results_job_candidate'
+    """)
+    if cursor.fetchone():
+        return
+    
+    # Older databases may hold duplicate pairs, keep the one that has an interview
+    # scheduled, otherwise the oldest row
+    cursor.execute("""
+    DELETE FROM match_results
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY job_id, candidate_id
+                ORDER BY interview_sent DESC, id
+            ) AS row_number
+            FROM match_results
+        )
+        WHERE row_number > 1
+    )
+    """)
+    
+    cursor.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_match_results_job_candidate
+    ON match_results (job_id, candidate_id)
+    """)
+
+
+def migrate_ingest_columns(cursor):
+    """Add the content hash columns used by incremental ingestion"""
+    add_missing_columns(cursor, 'candidates', {
+        'content_hash': 'TEXT',
+        'file_size': 'INTEGER',
+        'file_mtime_ns': 'INTEGER'
+    })
+    add_missing_columns(cursor, 'job_descriptions', {
+        'content_hash': 'TEXT'
+    })
+    
+    # Size and modification time of whole input files such as the JD CSV
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ingested_files (
+        path TEXT PRIMARY KEY,
+        file_size INTEGER,
+        file_mtime_ns INTEGER,
+        content_hash TEXT
+    )
+    ''')
+
+
+def migrate_hot_path_indexes(cursor):
+    """Indexes for the lookups done per job, per request and during ingestion"""
+    # Shortlisted, not yet invited candidates of a job by score; covers the
+    # candidate_id so the join never reads the match_results rows
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_match_results_job_shortlist
+    ON match_results (job_id, shortlisted, interview_sent, match_score, candidate_id)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_candidates_cv_path
+    ON candidates (cv_path)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_job_descriptions_title
+    ON job_descriptions (title)
+    """)
+
+
+def migrate_list_indexes(cursor):
+    """Indexes giving the paginated API lists a stable (sort column, id) order"""
+    # job_descriptions.title is already indexed, the rowid makes it (title, id)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_candidates_name
+    ON candidates (name)
+    """)
+
+
+# Counters shown by /api/stats and the query computing each from scratch
+STATS_COUNTERS = {
+    'jobs': "SELECT COUNT(*) FROM job_descriptions",
+    'candidates': "SELECT COUNT(*) FROM candidates",
+    'matches': "SELECT COUNT(*) FROM match_results",
+    'shortlisted': "SELECT COUNT(*) FROM match_results WHERE shortlisted = 1",
+    'interviews': "SELECT COUNT(*) FROM match_results WHERE interview_sent = 1",
+}
+
+
+def migrate_stats_counters(cursor):
+    """Single-row stats table kept up to date by triggers in the writing transaction"""
+    columns = ',\n'.join(f"        {name} INTEGER NOT NULL DEFAULT 0" for name in STATS_COUNTERS)
+    cursor.execute(f"""
+    CREATE TABLE IF NOT EXISTS stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+{columns}
+    )
+    """)
+    
+    for table, counter in [('job_descriptions', 'jobs'), ('candidates', 'candidates')]:
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE stats SET {counter} = {counter} + 1 WHERE id = 1;
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE stats SET {counter} = {counter} - 1 WHERE id = 1;
+        END
+        """)
+    
+    # (x IS 1) is 1 or 0 and, unlike x = 1, never NULL
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS stats_match_results_insert AFTER INSERT ON match_results
+    BEGIN
+        UPDATE stats SET
+            matches = matches + 1,
+            shortlisted = shortlisted + (NEW.shortlisted IS 1),
+            interviews = interviews + (NEW.interview_sent IS 1)
+        WHERE id = 1;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS stats_match_results_delete AFTER DELETE ON match_results
+    BEGIN
+        UPDATE stats SET
+            matches = matches - 1,
+            shortlisted = shortlisted - (OLD.shortlisted IS 1),
+            interviews = interviews - (OLD.interview_sent IS 1)
+        WHERE id = 1;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS stats_match_results_update
+    AFTER UPDATE OF shortlisted, interview_sent ON match_results
+    WHEN (NEW.shortlisted IS 1) != (OLD.shortlisted IS 1)
+      OR (NEW.interview_sent IS 1) != (OLD.interview_sent IS 1)
+    BEGIN
+        UPDATE stats SET
+            shortlisted = shortlisted + (NEW.shortlisted IS 1) - (OLD.shortlisted IS 1),
+            interviews = interviews + (NEW.interview_sent IS 1) - (OLD.interview_sent IS 1)
+        WHERE id = 1;
+    END
+    """)
+    
+    write_stats(cursor, count_stats(cursor))
+
+
+def count_stats(cursor):
+    """The stats counters computed from the tables"""
+    counts = {}
+    for name, query in STATS_COUNTERS.items():
+        cursor.execute(query)
+        counts[name] = cursor.fetchone()[0]
+    return counts
+
+
+def read_stats(cursor):
+    """The stats counters, one primary key read once the stats table exists"""
+    try:
+        cursor.execute(f"SELECT {', '.join(STATS_COUNTERS)} FROM stats WHERE id = 1")
+    except sqlite3.OperationalError:
+        # Database not migrated yet
+        return count_stats(cursor)
+    row = cursor.fetchone()
+    return dict(zip(STATS_COUNTERS, row)) if row else count_stats(cursor)
+
+
+def write_stats(cursor, counts):
+    names = list(STATS_COUNTERS)
+    cursor.execute(f"""
+    INSERT OR REPLACE INTO stats (id, {', '.join(names)})
+    VALUES (1, {', '.join('?' * len(names))})
+    """, [counts[name] for name in names])
+
+
+def check_stats(db_path='recruitment.db', repair=False):
+    """Recount the stats counters, return {name: (stored, actual)} for the ones that drifted"""
+    with get_database(db_path).transaction() as conn:
+        cursor = conn.cursor()
+        migrate_database(cursor)
+        stored = read_stats(cursor)
+        actual = count_stats(cursor)
+        drift = {name: (stored[name], actual[name]) for name in STATS_COUNTERS
+                 if stored[name] != actual[name]}
+        if drift and repair:
+            write_stats(cursor, actual)
+    return drift
+
+
+JOB_CONTENT_COLUMNS = 'title, description, summary, required_skills, experience, qualifications, responsibilities'
+
+
+def migrate_table_generations(cursor):
+    """Per-table generation numbers bumped by every write, used to invalidate in-process caches"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS table_generations (
+        table_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO table_generations (table_name) VALUES ('job_descriptions')")
+    # Bookkeeping columns such as content_hash do not change the generation
+    for name, event in [('insert', 'INSERT'), ('update', f'UPDATE OF {JOB_CONTENT_COLUMNS}'), ('delete', 'DELETE')]:
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS generation_job_descriptions_{name}
+        AFTER {event} ON job_descriptions
+        BEGIN
+            UPDATE table_generations SET generation = generation + 1
+            WHERE table_name = 'job_descriptions';
+        END
+        """)
+
+
+def table_generation(cursor, table):
+    """Generation of a table, None when it is not tracked (database not migrated yet)"""
+    try:
+        cursor.execute("SELECT generation FROM table_generations WHERE table_name = ?", (table,))
+    except sqlite3.OperationalError:
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def migrate_skill_dictionary(cursor):
+    """Skills with integer ids, their aliases and the candidate/job link tables, filled from the JSON columns"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS skills (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS skill_aliases (
+        alias TEXT PRIMARY KEY,
+        skill_id INTEGER NOT NULL REFERENCES skills(id)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS candidate_skills (
+        candidate_id INTEGER,
+        skill_id INTEGER,
+        PRIMARY KEY (candidate_id, skill_id)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_candidate_skills_skill
+    ON candidate_skills (skill_id)
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS job_skills (
+        job_id INTEGER,
+        skill_id INTEGER,
+        occurrences INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (job_id, skill_id)
+    ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_job_skills_skill
+    ON job_skills (skill_id)
+    """)
     
-    conn.commit()
-    conn.close()
+    dictionary = SkillDictionary(cursor)
+    dictionary.add_aliases(cursor, get_skill_aliases())
+    cursor.execute("SELECT id, skills FROM candidates")
+    for candidate_id, skills in cursor.fetchall():
+        dictionary.link_candidate(cursor, candidate_id, json.loads(skills) if skills else [])
+    cursor.execute("SELECT id, required_skills FROM job_descriptions")
+    for job_id, skills in cursor.fetchall():
+        dictionary.link_job(cursor, job_id, json.loads(skills) if skills else [])
+
+
+def migrate_candidate_generations(cursor):
+    """Generation of the candidates table and of every candidate row, used by the FeatureStore.
+    
+    Every insert or change of the scored columns bumps the table generation
+    and stamps the row with it, so the rows changed since a generation can be
+    found without rescanning the table.
+    """
+    add_missing_columns(cursor, 'candidates', {'feature_generation': 'INTEGER NOT NULL DEFAULT 0'})
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_candidates_feature_generation
+    ON candidates (feature_generation)
+    """)
+    cursor.execute("INSERT OR IGNORE INTO table_generations (table_name) VALUES ('candidates')")
+    
+    bump = """
+            UPDATE table_generations SET generation = generation + 1
+            WHERE table_name = 'candidates';"""
+    stamp = """
+            UPDATE candidates SET feature_generation = (
+                SELECT generation FROM table_generations WHERE table_name = 'candidates'
+            )
+            WHERE id = NEW.id;"""
+    scored_columns = 'skills, experience, education, certifications'
+    for name, event, body in [('insert', 'INSERT', bump + stamp),
+                              ('update', f'UPDATE OF {scored_columns}', bump + stamp),
+                              ('delete', 'DELETE', bump)]:
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS generation_candidates_{name}
+        AFTER {event} ON candidates
+        BEGIN{body}
+        END
+        """)
+
+
+def migrate_match_components(cursor):
+    """Score components of every match and per-job weight profiles, so new weights need no re-scoring.
+    
+    Matches stored before have NULL components until the next matching run.
+    """
+    add_missing_columns(cursor, 'match_results', {
+        'skills_score': 'REAL',
+        'experience_score': 'REAL',
+        'education_score': 'REAL',
+        'cert_bonus': 'REAL'
+    })
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS job_weights (
+        job_id INTEGER PRIMARY KEY REFERENCES job_descriptions(id),
+        skills REAL NOT NULL,
+        experience REAL NOT NULL,
+        education REAL NOT NULL,
+        certifications REAL NOT NULL
+    )
+    """)
+
+
+def migrate_match_watermarks(cursor):
+    """Generation stamps on jobs and the generations matching is complete up to.
+    
+    Like candidates, every insert or content change of a job now stamps the
+    row with the bumped table generation. match_watermarks holds, per table,
+    the generation up to which every row has been scored against every row
+    of the other table; -1 until the first complete matching run.
+    """
+    add_missing_columns(cursor, 'job_descriptions', {'feature_generation': 'INTEGER NOT NULL DEFAULT 0'})
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_job_descriptions_feature_generation
+    ON job_descriptions (feature_generation)
+    """)
+    
+    # The stamp has to follow the bump in the same trigger, the firing order
+    # of separate triggers is not defined
+    bump = """
+            UPDATE table_generations SET generation = generation + 1
+            WHERE table_name = 'job_descriptions';"""
+    stamp = """
+            UPDATE job_descriptions SET feature_generation = (
+                SELECT generation FROM table_generations WHERE table_name = 'job_descriptions'
+            )
+            WHERE id = NEW.id;"""
+    for name, event, body in [('insert', 'INSERT', bump + stamp),
+                              ('update', f'UPDATE OF {JOB_CONTENT_COLUMNS}', bump + stamp),
+                              ('delete', 'DELETE', bump)]:
+        cursor.execute(f"DROP TRIGGER IF EXISTS generation_job_descriptions_{name}")
+        cursor.execute(f"""
+        CREATE TRIGGER generation_job_descriptions_{name}
+        AFTER {event} ON job_descriptions
+        BEGIN{body}
+        END
+        """)
+    
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS match_watermarks (
+        table_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL
+    )
+    """)
+    cursor.executemany("INSERT OR IGNORE INTO match_watermarks (table_name, generation) VALUES (?, -1)",
+                       [('candidates',), ('job_descriptions',)])
+
+
+def match_watermarks(cursor):
+    """table -> generation up to which its rows have all been matched"""
+    cursor.execute("SELECT table_name, generation FROM match_watermarks")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def advance_match_watermarks(cursor, generations):
+    """Raise the watermarks to table -> generation, None values are skipped"""
+    cursor.executemany("""
+    UPDATE match_watermarks SET generation = MAX(generation, ?)
+    WHERE table_name = ?
+    """, [(generation, table) for table, generation in generations.items() if generation is not None])
+
+
+def migrate_job_thresholds(cursor):
+    """Threshold the stored shortlist of every job was built with, NULL for jobs not screened since"""
+    add_missing_columns(cursor, 'job_descriptions', {'shortlist_threshold': 'REAL'})
+
+
+def load_job_thresholds(cursor, job_ids):
+    """job_id -> threshold of its stored shortlist, for the jobs that have one"""
+    thresholds = {}
+    for job_id in job_ids:
+        cursor.execute("SELECT shortlist_threshold FROM job_descriptions WHERE id = ?", (job_id,))
+        row = cursor.fetchone()
+        if row and row[0] is not None:
+            thresholds[job_id] = row[0]
+    return thresholds
+
+
+def valid_id(value):
+    """Whether value is usable as a row id: an int, but not a bool"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def valid_threshold(threshold):
+    return not isinstance(threshold, bool) and isinstance(threshold, (int, float)) and 0.0 <= threshold <= 1.0
+
+
+# Applied in order, PRAGMA user_version is the number already applied. Every
+# migration must be idempotent: databases created before versioning start at 0.
+MIGRATIONS = [
+    create_base_tables,
+    migrate_match_results,
+    migrate_ingest_columns,
+    migrate_hot_path_indexes,
+    migrate_list_indexes,
+    migrate_stats_counters,
+    migrate_table_generations,
+    migrate_skill_dictionary,
+    migrate_candidate_generations,
+    migrate_match_components,
+    migrate_match_watermarks,
+    migrate_job_thresholds,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def add_missing_columns(cursor, table, columns):
+    """ALTER TABLE ADD COLUMN for each (name, type) in columns the table does not have yet"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_content_hash(*parts):
+    """SHA-256 hex digest of text fields"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+# Text preprocessing shared by all agents
+class TextPreprocessor:
+    """Lowercasing, tokenization, stopword removal and lemmatization.
+    
+    Lemmas are memoized in a bounded LRU cache since job descriptions reuse
+    a small vocabulary. tokenizer is 'punkt' (NLTK word_tokenize) or 'regex',
+    a much faster split on runs of word characters that gives the same tokens
+    on cleaned text apart from punkt's special cases such as "cannot".
+    """
+    TOKEN_PATTERN = re.compile(r'\w+')
+    
+    def __init__(self, tokenizer='punkt', lemma_cache_size=100000):
+        if tokenizer not in ('punkt', 'regex'):
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+        self.tokenizer = tokenizer
+        setup_nltk_resources(download=False)
+        self.stop_words = set(nltk_corpus.stopwords.words('english'))
+        self.lemmatizer = nltk_stem.WordNetLemmatizer()
+        self.lemmatize = functools.lru_cache(maxsize=lemma_cache_size)(self.lemmatizer.lemmatize)
+    
+    def tokenize(self, text):
+        if self.tokenizer == 'regex':
+            return self.TOKEN_PATTERN.findall(text)
+        return nltk_tokenize.word_tokenize(text)
+    
+    def preprocess(self, text):
+        """Clean and preprocess text"""
+        # Convert to lowercase and remove special characters
+        text = re.sub(r'[^\w\s]', ' ', text.lower())
+        # Tokenize
+        tokens = self.tokenize(text)
+        # Remove stopwords and lemmatize
+        stop_words = self.stop_words
+        lemmatize = self.lemmatize
+        return ' '.join([lemmatize(token) for token in tokens if token not in stop_words])
+    
+    def preprocess_batch(self, texts):
+        """preprocess() for many documents, identical documents are processed once"""
+        processed = {}
+        for text in texts:
+            if text not in processed:
+                processed[text] = self.preprocess(text)
+        return [processed[text] for text in texts]
+
+
+_preprocessors = {}
+
+
+def get_preprocessor(tokenizer=None):
+    """Process-wide TextPreprocessor, one per tokenizer
+    
+    The default tokenizer is 'punkt' unless MATCHMIND_TOKENIZER says otherwise.
+    """
+    tokenizer = tokenizer or os.environ.get('MATCHMIND_TOKENIZER', 'punkt')
+    if tokenizer not in _preprocessors:
+        _preprocessors[tokenizer] = TextPreprocessor(tokenizer)
+    return _preprocessors[tokenizer]
 
 
 # Agent 1: Job Description Summarizer
 class JDSummarizerAgent:
-    def __init__(self, db_path='recruitment.db'):
+    def __init__(self, db_path='recruitment.db', tfidf_model_path=None):
         self.db_path = db_path
-        self.stop_words = set(stopwords.words('english'))
-        self.lemmatizer = WordNetLemmatizer()
+        self.db = get_database(db_path)
+        # The corpus TF-IDF model is kept next to the database by default
+        self.tfidf_model_path = tfidf_model_path or os.path.splitext(db_path)[0] + '_tfidf.json'
+        self.tfidf_model = None
     
-    def load_job_descriptions(self, jd_file_path):
-        """Load job descriptions from CSV file"""
+    @property
+    def preprocessor(self):
+        # Shared and created on first use, so NLTK is not loaded until text is processed
+        return get_preprocessor()
+    
+    @timed('jd_summarizer')
+    def load_job_descriptions(self, jd_file_path, refit_tfidf=False):
+        """Load job descriptions from CSV file
+        
+        Rows are skipped when their content hash is unchanged and re-summarized
+        in place when the description changed. A CSV whose
+        size, modification time and hash match the last load is not read at all.
+        With refit_tfidf the TF-IDF model is fitted again on the whole file and
+        every row is re-summarized with it.
+        """
         try:
-            # Try different encodings with explicit error handling
-            encodings = ['utf-8', 'latin1', 'cp1252', 'ISO-8859-1']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    # Add error_bad_lines=False (skipinitialspace for possible CSV formatting issues)
-                    df = pd.read_csv(jd_file_path, encoding=encoding, skipinitialspace=True, 
-                                     on_bad_lines='skip')
-                    print(f"Successfully loaded file with encoding: {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    print(f"Failed to decode with {encoding}, trying next encoding...")
-                    continue
-                except Exception as e:
-                    print(f"Error with {encoding}: {e}")
-                    continue
+            with self.db.transaction() as conn:
+                return self._load_job_descriptions(conn.cursor(), jd_file_path, refit_tfidf)
+        except Exception as e:
+            print(f"Error loading job descriptions: {e}")
+            return False
+    
+    def _load_job_descriptions(self, cursor, jd_file_path, refit_tfidf=False):
+        migrate_database(cursor)
+        
+        stat = os.stat(jd_file_path)
+        cursor.execute("""
+        SELECT file_size, file_mtime_ns, content_hash FROM ingested_files WHERE path = ?
+        """, (jd_file_path,))
+        known_file = cursor.fetchone()
+        if not refit_tfidf and known_file and known_file[:2] == (stat.st_size, stat.st_mtime_ns):
+            print("Job descriptions file unchanged, skipping")
+            return True
+        
+        file_hash = file_content_hash(jd_file_path)
+        if not refit_tfidf and known_file and known_file[2] == file_hash:
+            self._record_ingested_file(cursor, jd_file_path, stat, file_hash)
+            print("Job descriptions file unchanged, skipping")
+            return True
+        
+        # Try different encodings with explicit error handling
+        encodings = ['utf-8', 'latin1', 'cp1252', 'ISO-8859-1']
+        df = None
+        
+        for encoding in encodings:
+            try:
+                # Add error_bad_lines=False (skipinitialspace for possible CSV formatting issues)
+                df = pd.read_csv(jd_file_path, encoding=encoding, skipinitialspace=True, 
+                                 on_bad_lines='skip')
+                print(f"Successfully loaded file with encoding: {encoding}")
+                break
+            except UnicodeDecodeError:
+                print(f"Failed to decode with {encoding}, trying next encoding...")
+                continue
+            except Exception as e:
+                print(f"Error with {encoding}: {e}")
+                continue
+        
+        if df is None:
+            raise ValueError("Could not decode file with any of the attempted encodings")
+        
+        # Clean the data to handle potential special characters
+        df['Job Title'] = df['Job Title'].str.strip().fillna('Untitled Position')
+        df['Job Description'] = df['Job Description'].str.strip().fillna('No description available')
+        
+        # Known jobs by title with their content hash
+        cursor.execute("SELECT title, id, content_hash FROM job_descriptions")
+        known_jobs = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        seen_titles = set()
+        to_summarize = []  # (title, description, content_hash, job_id or None)
+        for _, row in df.iterrows():
+            title = str(row['Job Title'])
+            description = str(row['Job Description'])
+            content_hash = text_content_hash(title, description)
             
-            if df is None:
-                raise ValueError("Could not decode file with any of the attempted encodings")
+            # Like before, the first row with a given title wins
+            if title in seen_titles:
+                continue
+            seen_titles.add(title)
             
-            # Clean the data to handle potential special characters
-            df['Job Title'] = df['Job Title'].str.strip().fillna('Untitled Position')
-            df['Job Description'] = df['Job Description'].str.strip().fillna('No description available')
+            # Check if job already exists
+            job_id, known_hash = known_jobs.get(title, (None, None))
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            if job_id is not None and known_hash in (None, content_hash) and not refit_tfidf:
+                if known_hash is None:
+                    # Loaded before hashes were stored, just record it
+                    cursor.execute("UPDATE job_descriptions SET content_hash = ? WHERE id = ?",
+                                   (content_hash, job_id))
+                continue
             
-            for _, row in df.iterrows():
-                try:
-                    title = str(row['Job Title'])
-                    description = str(row['Job Description'])
-                    
-                    # Check if job already exists
-                    cursor.execute("SELECT id FROM job_descriptions WHERE title = ?", (title,))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        # Process and summarize the job description
-                        summary, skills, exp, qualifications, responsibilities = self.summarize_job_description(description)
-                        
-                        cursor.execute('''
-                        INSERT INTO job_descriptions (title, description, summary, required_skills, 
-                                                     experience, qualifications, responsibilities)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ''', (title, description, summary, json.dumps(skills), 
-                              json.dumps(exp), json.dumps(qualifications), json.dumps(responsibilities)))
-                except Exception as e:
-                    print(f"Error processing job: {e}")
-                    continue
-            
-            conn.commit()
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Error loading job descriptions: {e}")
-            return False
+            to_summarize.append((title, description, content_hash, job_id))
+        
+        # Process and summarize all new or changed job descriptions in one batch
+        summaries = self.summarize_job_descriptions([job[1] for job in to_summarize], refit=refit_tfidf)
+        skill_dictionary = SkillDictionary(cursor)
+        skill_dictionary.add_aliases(cursor, get_skill_aliases())
+        
+        failed_rows = 0
+        for (title, description, content_hash, job_id), summarized in zip(to_summarize, summaries):
+            try:
+                summary, skills, exp, qualifications, responsibilities = summarized
+                
+                if job_id is None:
+                    cursor.execute('''
+                    INSERT INTO job_descriptions (title, description, summary, required_skills, 
+                                                 experience, qualifications, responsibilities,
+                                                 content_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (title, description, summary, json.dumps(skills), 
+                          json.dumps(exp), json.dumps(qualifications), json.dumps(responsibilities),
+                          content_hash))
+                    job_id = cursor.lastrowid
+                else:
+                    cursor.execute('''
+                    UPDATE job_descriptions
+                    SET description = ?, summary = ?, required_skills = ?, experience = ?,
+                        qualifications = ?, responsibilities = ?, content_hash = ?
+                    WHERE id = ?
+                    ''', (description, summary, json.dumps(skills), json.dumps(exp),
+                          json.dumps(qualifications), json.dumps(responsibilities),
+                          content_hash, job_id))
+                skill_dictionary.link_job(cursor, job_id, skills)
+            except Exception as e:
+                print(f"Error processing job: {e}")
+                failed_rows += 1
+                continue
+        
+        # Only skip the file next time if every row made it in
+        if not failed_rows:
+            self._record_ingested_file(cursor, jd_file_path, stat, file_hash)
+        return True
+
+    def _record_ingested_file(self, cursor, path, stat, content_hash):
+        cursor.execute("""
+        INSERT INTO ingested_files (path, file_size, file_mtime_ns, content_hash)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (path) DO UPDATE SET
+            file_size = excluded.file_size,
+            file_mtime_ns = excluded.file_mtime_ns,
+            content_hash = excluded.content_hash
+        """, (path, stat.st_size, stat.st_mtime_ns, content_hash))
     
     def preprocess_text(self, text):
         """Clean and preprocess text"""
-        # Convert to lowercase and remove special characters
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        # Tokenize
-        tokens = word_tokenize(text)
-        # Remove stopwords and lemmatize
-        processed_tokens = [self.lemmatizer.lemmatize(token) for token in tokens if token not in self.stop_words]
-        return ' '.join(processed_tokens)
+        return self.preprocessor.preprocess(text)
     
     def summarize_job_description(self, description):
-        """Extract key elements from job description"""
-        # Preprocessing
-        processed_text = self.preprocess_text(description)
+        """Extract key elements from job description, with the skills of the corpus TF-IDF model"""
+        return self.summarize_job_descriptions([description])[0]
+    
+    @timed('jd_summarizer')
+    def summarize_job_descriptions(self, descriptions, refit=False):
+        """Batch version of summarize_job_description
         
-        # Identify sections using regex patterns
-        skills_pattern = r'skills|requirements|proficiency|knowledge'
-        experience_pattern = r'experience|years|background'
-        qualifications_pattern = r'qualifications|education|degree|certification'
-        responsibilities_pattern = r'responsibilities|duties|tasks|role'
+        Skill terms come from one TF-IDF model over the whole JD corpus. The
+        saved model is reused when there is one, so new job descriptions are
+        only transformed; otherwise (or with refit) it is fitted on this batch.
+        Terms outside the saved vocabulary are dropped by the transform: when
+        more than TFIDF_REFIT_UNKNOWN_RATIO of the batch's terms are, the model
+        is fitted again over the stored job descriptions and this batch.
+        """
+        AGENT_ITEMS.inc(('jd_summarizer', 'jobs'), len(descriptions))
+        processed_texts = self.preprocessor.preprocess_batch(descriptions)
+        skills_texts = [self._skills_text(text) for text in processed_texts]
+        documents = [text for text in skills_texts if text is not None]
         
-        # Extract skills
-        skills = []
+        top_terms = []
+        if documents:
+            model = None if refit else self.get_tfidf_model()
+            if model is not None:
+                terms = model.document_terms(documents)
+                unknown = sorted(terms - model.vocabulary.keys())
+                if unknown:
+                    print(f"Warning: {len(unknown)} of {len(terms)} job description terms are not in the "
+                          f"saved TF-IDF vocabulary and cannot be skills: {', '.join(unknown[:10])}")
+                if len(unknown) > TFIDF_REFIT_UNKNOWN_RATIO * len(terms):
+                    print("Refitting the TF-IDF model over all job descriptions...")
+                    model = self.refit_tfidf_model(descriptions)
+            if model is None:
+                model = CorpusTfidfModel.fit(documents)
+                model.save(self.tfidf_model_path)
+                self.tfidf_model = model
+            top_terms = model.top_terms(model.transform(documents), 10)
+        
+        summaries = []
+        documents_seen = 0
+        for processed_text, skills_text in zip(processed_texts, skills_texts):
+            skills = []
+            if skills_text is not None:
+                skills = top_terms[documents_seen]
+                documents_seen += 1
+            summaries.append(self._summarize_sections(processed_text, skills))
+        return summaries
+    
+    def refit_tfidf_model(self, new_descriptions=()):
+        """Fit the TF-IDF model again over every job description in the database and new_descriptions"""
+        cursor = self.db.connection().cursor()
+        cursor.execute("SELECT description FROM job_descriptions")
+        descriptions = [row[0] or '' for row in cursor.fetchall()] + list(new_descriptions)
+        
+        documents = [text for text in (self._skills_text(processed_text)
+                                       for processed_text in self.preprocessor.preprocess_batch(descriptions))
+                     if text is not None]
+        self.tfidf_model = CorpusTfidfModel.fit(documents)
+        self.tfidf_model.save(self.tfidf_model_path)
+        return self.tfidf_model
+    
+    def get_tfidf_model(self):
+        """The saved corpus TF-IDF model, or None if none was fitted yet"""
+        if self.tfidf_model is None and os.path.exists(self.tfidf_model_path):
+            self.tfidf_model = CorpusTfidfModel.load(self.tfidf_model_path)
+        return self.tfidf_model
+    
+    def _skills_text(self, processed_text):
+        """Part of the preprocessed text skills are taken from, None without a skills section"""
+        skills_pattern = r'skills|requirements|proficiency|knowledge'
         skills_section = re.search(f'.*({skills_pattern}).*', processed_text, re.IGNORECASE)
         if skills_section:
-            skills_text = processed_text[skills_section.start():]
-            # Extract keywords using TF-IDF
-            vectorizer = TfidfVectorizer(max_features=20)
-            tfidf_matrix = vectorizer.fit_transform([skills_text])
-            feature_names = vectorizer.get_feature_names_out()
-            skills = [feature_names[i] for i in tfidf_matrix.toarray()[0].argsort()[-10:][::-1]]
+            return processed_text[skills_section.start():]
+        return None
+    
+    def _summarize_sections(self, processed_text, skills):
+        skills = canonical_skills(skills)
         
         # Similar extraction for other sections
         experience = self.extract_experience(processed_text)
@@ -237,53 +1292,387 @@ class JDSummarizerAgent:
         return responsibilities
 
 
+# TF-IDF model fitted over the whole job description corpus
+# Share of a batch's terms that may be missing from the saved TF-IDF vocabulary before it is refitted
+TFIDF_REFIT_UNKNOWN_RATIO = 0.2
+
+
+class CorpusTfidfModel:
+    """Vocabulary and IDF weights of a TfidfVectorizer, saved as JSON.
+    
+    transform() recomputes l2-normalized TF-IDF rows from the saved vocabulary
+    and IDF, so new documents never require the model to be fitted again.
+    """
+    VERSION = 1
+    
+    def __init__(self, vocabulary, idf):
+        self.vocabulary = vocabulary
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.terms = [None] * len(vocabulary)
+        for term, index in vocabulary.items():
+            self.terms[index] = term
+    
+    @classmethod
+    def fit(cls, documents):
+        vectorizer = sklearn_text.TfidfVectorizer()
+        vectorizer.fit(documents)
+        vocabulary = {term: int(index) for term, index in vectorizer.vocabulary_.items()}
+        return cls(vocabulary, vectorizer.idf_)
+    
+    @staticmethod
+    def document_terms(documents):
+        """Distinct terms of documents as TfidfVectorizer tokenizes them"""
+        analyze = sklearn_text.CountVectorizer().build_analyzer()
+        return {term for document in documents for term in analyze(document)}
+    
+    def transform(self, documents):
+        """Sparse (n_documents, n_terms) TF-IDF matrix, same as TfidfVectorizer.transform"""
+        counts = sklearn_text.CountVectorizer(vocabulary=self.vocabulary).transform(documents)
+        return sklearn_preprocessing.normalize(counts.multiply(self.idf).tocsr(), norm='l2', copy=False)
+    
+    def top_terms(self, matrix, n=10):
+        """The n highest weighted terms of every row, best first"""
+        matrix = matrix.tocsr()
+        top = []
+        for row in range(matrix.shape[0]):
+            start, stop = matrix.indptr[row], matrix.indptr[row + 1]
+            indices = matrix.indices[start:stop]
+            # Highest weight first, ties broken by vocabulary index
+            order = np.lexsort((indices, -matrix.data[start:stop]))[:n]
+            top.append([self.terms[i] for i in indices[order]])
+        return top
+    
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'version': self.VERSION,
+                'vocabulary': self.vocabulary,
+                'idf': self.idf.tolist()
+            }, file)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported TF-IDF model version in {path}")
+        return cls(data['vocabulary'], data['idf'])
+
+
+# Dictionary matching for skills and certifications
+DEFAULT_TECH_SKILLS = [
+    "python", "java", "javascript", "c++", "sql", "nosql", "aws", "azure",
+    "php", "html", "css", "react", "angular", "vue", "node", "express", 
+    "django", "flask", "spring", "hibernate", "docker", "kubernetes",
+    "git", "jenkins", "ci/cd", "agile", "scrum", "tensorflow", "pytorch",
+    "machine learning", "artificial intelligence", "data science", "nlp",
+    "network", "security", "linux", "windows", "macos", "unix"
+]
+
+# Other spellings of skills, extracted and stored as the skill they stand for
+DEFAULT_SKILL_ALIASES = {
+    "js": "javascript", "ecmascript": "javascript",
+    "reactjs": "react", "react.js": "react",
+    "vuejs": "vue", "vue.js": "vue",
+    "angularjs": "angular",
+    "nodejs": "node", "node.js": "node",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "cicd": "ci/cd", "continuous integration": "ci/cd",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "natural language processing": "nlp",
+}
+
+CERTIFICATION_KEYWORDS = [
+    "certified", "certificate", "certification", "aws", "microsoft", 
+    "cisco", "oracle", "comptia", "pmp", "itil", "scrum", "professional"
+]
+
+
+class KeywordMatcher:
+    """Find every occurrence of many dictionary terms in one pass over a text.
+    
+    The terms are compiled into a single regex shaped like a trie, so the
+    cost per position depends on the term length rather than on the number
+    of terms. Matching is case-insensitive; with word_boundaries a term must
+    not be directly preceded or followed by a word character.
+    """
+    def __init__(self, terms, word_boundaries=True):
+        self.terms = list(dict.fromkeys(term.lower() for term in terms if term))
+        self.positions = {term: i for i, term in enumerate(self.terms)}
+        self.word_boundaries = word_boundaries
+        
+        trie = {}
+        for term in self.terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = True
+        
+        # The lookahead makes finditer report matches that overlap each other
+        pattern = self._trie_pattern(trie)
+        if word_boundaries:
+            pattern = r'(?<!\w)(' + pattern + r')(?!\w)'
+        else:
+            pattern = '(' + pattern + ')'
+        self.regex = re.compile('(?=' + pattern + ')', re.IGNORECASE) if self.terms else None
+        
+        # The regex reports the longest term at a position, shorter terms that
+        # are prefixes of it are checked from this table
+        self.prefix_terms = {}
+        for term in self.terms:
+            self.prefix_terms[term] = [term[:i] for i in range(1, len(term)) if term[:i] in self.positions]
+    
+    def find_all(self, text):
+        """List of (start, term) for every occurrence of every term"""
+        found = []
+        if self.regex is None:
+            return found
+        for match in self.regex.finditer(text):
+            start = match.start()
+            term = match.group(1).lower()
+            found.append((start, term))
+            for prefix in self.prefix_terms.get(term, ()):
+                end = start + len(prefix)
+                if not self.word_boundaries or end == len(text) or not self._is_word_char(text[end]):
+                    found.append((start, prefix))
+        return found
+    
+    def find_terms(self, text):
+        """Distinct terms found in text, in vocabulary order"""
+        found = {term for _, term in self.find_all(text)}
+        return sorted(found, key=self.positions.get)
+    
+    @staticmethod
+    def _is_word_char(char):
+        return re.match(r'\w', char) is not None
+    
+    @classmethod
+    def _trie_pattern(cls, node):
+        alternatives = [re.escape(char) + cls._trie_pattern(child)
+                        for char, child in sorted(node.items()) if char != '']
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and '' not in node:
+            return alternatives[0]
+        pattern = '(?:' + '|'.join(alternatives) + ')'
+        # Greedy, so the longer term is tried before the one ending here
+        return pattern + '?' if '' in node else pattern
+
+
+_skill_matcher = None
+_skill_vocabulary = None
+_skill_aliases = dict(DEFAULT_SKILL_ALIASES)
+_certification_matcher = None
+
+
+def get_skill_matcher():
+    """Process-wide skill matcher, built on first use
+    
+    The vocabulary is DEFAULT_TECH_SKILLS unless MATCHMIND_SKILLS_FILE points
+    to a file with one skill per line.
+    """
+    global _skill_matcher
+    if _skill_matcher is None:
+        skills_file = os.environ.get('MATCHMIND_SKILLS_FILE')
+        if _skill_vocabulary is not None:
+            set_skill_vocabulary(_skill_vocabulary)
+        elif skills_file:
+            load_skill_vocabulary(skills_file)
+        else:
+            set_skill_vocabulary(DEFAULT_TECH_SKILLS)
+    return _skill_matcher
+
+
+def set_skill_vocabulary(skills):
+    """Replace the process-wide skill vocabulary, the skill aliases are matched too"""
+    global _skill_matcher, _skill_vocabulary
+    _skill_vocabulary = list(skills)
+    _skill_matcher = KeywordMatcher(_skill_vocabulary + list(_skill_aliases))
+
+
+def get_skill_aliases():
+    """Process-wide lowercase alias -> skill map"""
+    return _skill_aliases
+
+
+def set_skill_aliases(aliases):
+    """Replace the process-wide skill aliases"""
+    global _skill_aliases, _skill_matcher
+    _skill_aliases = {alias.lower(): skill.lower() for alias, skill in aliases.items()}
+    # Rebuilt with the new aliases on next use
+    _skill_matcher = None
+
+
+def canonical_skills(skills):
+    """skills with aliases replaced by the skill they stand for and case-insensitive duplicates dropped"""
+    aliases = get_skill_aliases()
+    result, seen = [], set()
+    for skill in skills:
+        skill = aliases.get(skill.lower(), skill)
+        if skill.lower() not in seen:
+            seen.add(skill.lower())
+            result.append(skill)
+    return result
+
+
+def load_skill_vocabulary(path):
+    """Load the skill vocabulary from a text file, one skill per line ('#' starts a comment)"""
+    with open(path, encoding='utf-8') as file:
+        skills = [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
+    set_skill_vocabulary(skills)
+    return len(skills)
+
+
+def get_certification_matcher():
+    """Process-wide matcher for CERTIFICATION_KEYWORDS (no word boundaries)"""
+    global _certification_matcher
+    if _certification_matcher is None:
+        _certification_matcher = KeywordMatcher(CERTIFICATION_KEYWORDS, word_boundaries=False)
+    return _certification_matcher
+
+
 # Agent 2: CV Parsing and Recruiting Agent
 class CVParsingAgent:
     def __init__(self, db_path='recruitment.db'):
         self.db_path = db_path
-        self.stop_words = set(stopwords.words('english'))
-        self.lemmatizer = WordNetLemmatizer()
+        self.db = get_database(db_path)
     
-    def load_and_parse_cvs(self, cv_folder_path):
-        """Load and parse all CVs from a folder"""
+    @timed('cv_parser')
+    def load_and_parse_cvs(self, cv_folder_path, workers=None, timeout=60, batch_size=100, progress=None):
+        """Load and parse all CVs from a folder
+        
+        Files whose size and modification time match the stored values are
+        skipped without being opened. Otherwise the content hash decides: an
+        unchanged file is skipped, a renamed one only gets its path updated and
+        an edited one is re-parsed in place.
+        
+        With workers > 1 the PDFs are parsed in a CVExtractionPool, each file
+        with its own timeout, while this process writes the results in batches.
+        progress is called with ('cvs', parsed, total) after every CV.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for filename in os.listdir(cv_folder_path):
-                if filename.endswith('.pdf'):
-                    cv_path = os.path.join(cv_folder_path, filename)
-                    
-                    # Extract candidate ID from filename (assuming format like C1234.pdf)
-                    candidate_id = os.path.splitext(filename)[0]
-                    
-                    # Check if candidate already exists
-                    cursor.execute("SELECT id FROM candidates WHERE cv_path = ?", (cv_path,))
-                    result = cursor.fetchone()
-                    
-                    if not result:
-                        # Parse the CV
-                        cv_text = self.extract_text_from_pdf(cv_path)
-                        name, email = self.extract_personal_info(cv_text)
-                        education = json.dumps(self.extract_education(cv_text))
-                        experience = json.dumps(self.extract_experience(cv_text))
-                        skills = json.dumps(self.extract_skills(cv_text))
-                        certifications = json.dumps(self.extract_certifications(cv_text))
-                        
-                        cursor.execute('''
-                        INSERT INTO candidates (name, email, cv_path, parsed_cv, 
-                                              education, experience, skills, certifications)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (name, email, cv_path, cv_text, 
-                              education, experience, skills, certifications))
-            
-            conn.commit()
-            conn.close()
-            return True
+            with self.db.transaction() as conn:
+                return self._load_and_parse_cvs(conn, cv_folder_path, workers, timeout, batch_size, progress)
         except Exception as e:
             print(f"Error parsing CVs: {e}")
             return False
     
+    def _load_and_parse_cvs(self, conn, cv_folder_path, workers, timeout, batch_size, progress):
+        cursor = conn.cursor()
+        migrate_database(cursor)
+        
+        cursor.execute("SELECT id, cv_path, file_size, file_mtime_ns, content_hash FROM candidates")
+        known_cvs = {}
+        known_hashes = {}
+        for candidate_id, cv_path, file_size, file_mtime_ns, content_hash in cursor.fetchall():
+            known_cvs[cv_path] = (candidate_id, file_size, file_mtime_ns, content_hash)
+            if content_hash:
+                known_hashes.setdefault(content_hash, (candidate_id, cv_path))
+        
+        to_parse = {}  # cv_path -> (candidate_id or None, stat, content_hash)
+        for entry in os.scandir(cv_folder_path):
+            if not entry.name.endswith('.pdf') or not entry.is_file():
+                continue
+            # Same path joining as before so cv_path values stay comparable
+            cv_path = os.path.join(cv_folder_path, entry.name)
+            stat = entry.stat()
+            candidate_id, file_size, file_mtime_ns, known_hash = known_cvs.get(cv_path, (None, None, None, None))
+            
+            # Cheap pre-check, the file is not opened
+            if candidate_id is not None and (file_size, file_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            
+            content_hash = file_content_hash(cv_path)
+            if candidate_id is not None and known_hash in (None, content_hash):
+                # Unchanged content (or parsed before hashes were stored)
+                self._record_cv_file(cursor, candidate_id, cv_path, stat, content_hash)
+                continue
+            
+            if candidate_id is None and content_hash in known_hashes:
+                renamed_id, old_path = known_hashes[content_hash]
+                if not os.path.exists(old_path):
+                    # Same content under a new name
+                    self._record_cv_file(cursor, renamed_id, cv_path, stat, content_hash)
+                    known_cvs[cv_path] = (renamed_id, stat.st_size, stat.st_mtime_ns, content_hash)
+                    known_hashes[content_hash] = (renamed_id, cv_path)
+                    continue
+            
+            to_parse[cv_path] = (candidate_id, stat, content_hash)
+        
+        if workers and workers > 1:
+            parsed_cvs = CVExtractionPool(self.db_path, workers, timeout).parse(list(to_parse))
+        else:
+            parsed_cvs = ((cv_path, self.parse_cv(cv_path), None) for cv_path in to_parse)
+        
+        skill_dictionary = SkillDictionary(cursor)
+        skill_dictionary.add_aliases(cursor, get_skill_aliases())
+        
+        pending = 0
+        report_progress(progress, 'cvs', 0, len(to_parse))
+        for done, (cv_path, cv, error) in enumerate(parsed_cvs, 1):
+            report_progress(progress, 'cvs', done, len(to_parse))
+            if error:
+                AGENT_ITEMS.inc(('cv_parser', 'errors'))
+                print(f"Error parsing {cv_path}: {error}")
+                continue
+            
+            candidate_id, stat, content_hash = to_parse[cv_path]
+            # Counted here rather than in parse_cv, which may run in a pool worker
+            AGENT_ITEMS.inc(('cv_parser', 'cvs'))
+            PDF_BYTES.inc((), stat.st_size)
+            fields = (cv['name'], cv['email'], cv_path, cv['text'],
+                      json.dumps(cv['education']), json.dumps(cv['experience']),
+                      json.dumps(cv['skills']), json.dumps(cv['certifications']),
+                      content_hash, stat.st_size, stat.st_mtime_ns)
+            if candidate_id is None:
+                cursor.execute('''
+                INSERT INTO candidates (name, email, cv_path, parsed_cv, 
+                                      education, experience, skills, certifications,
+                                      content_hash, file_size, file_mtime_ns)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', fields)
+                candidate_id = cursor.lastrowid
+            else:
+                cursor.execute('''
+                UPDATE candidates
+                SET name = ?, email = ?, cv_path = ?, parsed_cv = ?,
+                    education = ?, experience = ?, skills = ?, certifications = ?,
+                    content_hash = ?, file_size = ?, file_mtime_ns = ?
+                WHERE id = ?
+                ''', fields + (candidate_id,))
+            skill_dictionary.link_candidate(cursor, candidate_id, cv['skills'])
+            
+            pending += 1
+            if pending >= batch_size:
+                conn.commit()
+                pending = 0
+        
+        return True
+    
+    def _record_cv_file(self, cursor, candidate_id, cv_path, stat, content_hash):
+        cursor.execute("""
+        UPDATE candidates
+        SET cv_path = ?, file_size = ?, file_mtime_ns = ?, content_hash = ?
+        WHERE id = ?
+        """, (cv_path, stat.st_size, stat.st_mtime_ns, content_hash, candidate_id))
+    
+    @timed('cv_parser')
+    def parse_cv(self, cv_path):
+        """Extract text and all candidate fields from one CV"""
+        cv_text = self.extract_text_from_pdf(cv_path)
+        name, email = self.extract_personal_info(cv_text)
+        return {
+            'name': name,
+            'email': email,
+            'text': cv_text,
+            'education': self.extract_education(cv_text),
+            'experience': self.extract_experience(cv_text),
+            'skills': self.extract_skills(cv_text),
+            'certifications': self.extract_certifications(cv_text)
+        }
+    
     def extract_text_from_pdf(self, pdf_path):
         """Extract text from PDF file"""
         text = ""
@@ -383,34 +1772,24 @@ class CVParsingAgent:
         """Extract skills from CV"""
         skills = []
         
-        # Common technical skills
-        tech_skills = [
-            "python", "java", "javascript", "c\\+\\+", "sql", "nosql", "aws", "azure",
-            "php", "html", "css", "react", "angular", "vue", "node", "express", 
-            "django", "flask", "spring", "hibernate", "docker", "kubernetes",
-            "git", "jenkins", "ci/cd", "agile", "scrum", "tensorflow", "pytorch",
-            "machine learning", "artificial intelligence", "data science", "nlp",
-            "network", "security", "linux", "windows", "macos", "unix"
-        ]
-        
         # Look for skills section
         skills_section = re.search(r'(?i)(?:technical |key |core )?skills|technologies|languages|tools', text)
         if skills_section:
             skills_text = text[skills_section.start():skills_section.start() + 1000]
             
-            # Match skills from our predefined list
-            for skill in tech_skills:
-                if re.search(r'\b' + skill + r'\b', skills_text, re.IGNORECASE):
-                    skills.append(skill)
+            # Match skills from the skill vocabulary in one pass
+            skills = get_skill_matcher().find_terms(skills_text)
+            seen = {skill.lower() for skill in skills}
             
             # Also look for anything between commas in the skills section
             comma_skills = re.findall(r'([^,]+),', skills_text)
             for skill in comma_skills:
                 cleaned_skill = skill.strip()
-                if 2 < len(cleaned_skill) < 25 and cleaned_skill.lower() not in [s.lower() for s in skills]:
+                if 2 < len(cleaned_skill) < 25 and cleaned_skill.lower() not in seen:
                     skills.append(cleaned_skill)
+                    seen.add(cleaned_skill.lower())
         
-        return skills
+        return canonical_skills(skills)
     
     def extract_certifications(self, text):
         """Extract certifications from CV"""
@@ -421,29 +1800,194 @@ class CVParsingAgent:
         if cert_section:
             cert_text = text[cert_section.start():cert_section.start() + 500]
             
-            # Common certification keywords
-            cert_keywords = [
-                "certified", "certificate", "certification", "aws", "microsoft", 
-                "cisco", "oracle", "comptia", "pmp", "itil", "scrum", "professional"
-            ]
-            
-            # Extract certification patterns
-            for keyword in cert_keywords:
-                matches = re.findall(r'(?i)' + keyword + r'[^.]*', cert_text)
-                for match in matches:
-                    if 10 < len(match) < 100:  # Reasonable certification name length
-                        match = match.strip()
-                        if match not in certifications:
-                            certifications.append(match)
+            # A certification runs from a keyword to the end of its sentence. Only
+            # the first occurrence of each keyword per sentence starts one.
+            sentence_ends = [i for i, char in enumerate(cert_text) if char == '.'] + [len(cert_text)]
+            first_seen = {}
+            for start, keyword in get_certification_matcher().find_all(cert_text):
+                sentence = bisect_right(sentence_ends, start - 1)
+                first_seen.setdefault((keyword, sentence), start)
+            
+            # Extract certification patterns, in keyword then sentence order
+            for (keyword, sentence), start in sorted(
+                    first_seen.items(), key=lambda item: (get_certification_matcher().positions[item[0][0]], item[0][1])):
+                match = cert_text[start:sentence_ends[sentence]]
+                if 10 < len(match) < 100:  # Reasonable certification name length
+                    match = match.strip()
+                    if match not in certifications:
+                        certifications.append(match)
         
         return certifications
 
 
+# Process pool used by CVParsingAgent to parse PDFs in parallel
+class CVExtractionPool:
+    """Parse CVs in worker processes with a per-file timeout.
+    
+    Every worker has its own pipe, so a worker that hangs on a malformed PDF
+    or crashes can be killed and replaced without affecting the others.
+    Workers are started from worker_context() and report when they are
+    ready; a file's timeout only starts once its worker has started up,
+    which may take up to startup_timeout seconds.
+    """
+    def __init__(self, db_path='recruitment.db', workers=None, timeout=60, startup_timeout=120):
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.context = worker_context()
+    
+    def parse(self, cv_paths):
+        """Yield (cv_path, parsed_cv, error) for every path, in completion order"""
+        pending = list(reversed(cv_paths))
+        starting = {}  # pipe -> (process, deadline)
+        idle = []
+        busy = {}  # pipe -> (process, cv_path, deadline)
+        
+        def start_worker():
+            process, pipe = self._start_worker()
+            starting[pipe] = (process, time.monotonic() + self.startup_timeout)
+        
+        try:
+            for _ in range(min(self.workers, len(pending))):
+                start_worker()
+            
+            while pending or busy:
+                while pending and idle:
+                    process, pipe = idle.pop()
+                    cv_path = pending.pop()
+                    pipe.send(cv_path)
+                    busy[pipe] = (process, cv_path, time.monotonic() + self.timeout)
+                
+                deadlines = [deadline for _, deadline in starting.values()]
+                deadlines += [deadline for _, _, deadline in busy.values()]
+                wait_for = max(0.0, min(deadlines) - time.monotonic())
+                for pipe in multiprocessing.connection.wait(list(starting) + list(busy), timeout=wait_for):
+                    if pipe in starting:
+                        process, _ = starting.pop(pipe)
+                        try:
+                            pipe.recv()
+                        except (EOFError, OSError):
+                            self._stop_worker(process, pipe)
+                            raise RuntimeError(f"CV worker exited with code {process.exitcode} while starting")
+                        idle.append((process, pipe))
+                        continue
+                    
+                    process, cv_path, _ = busy.pop(pipe)
+                    try:
+                        parsed_cv, error = pipe.recv()
+                    except (EOFError, OSError):
+                        # The worker died while parsing this file
+                        self._stop_worker(process, pipe)
+                        if pending:
+                            start_worker()
+                        yield cv_path, None, f"worker exited with code {process.exitcode}"
+                        continue
+                    idle.append((process, pipe))
+                    yield cv_path, parsed_cv, error
+                
+                now = time.monotonic()
+                for pipe, (process, deadline) in starting.items():
+                    if now >= deadline:
+                        raise RuntimeError(f"CV worker did not start within {self.startup_timeout}s")
+                for pipe, (process, cv_path, deadline) in list(busy.items()):
+                    if now >= deadline:
+                        del busy[pipe]
+                        self._stop_worker(process, pipe)
+                        if pending:
+                            start_worker()
+                        yield cv_path, None, f"timed out after {self.timeout}s"
+        finally:
+            for process, pipe in idle:
+                try:
+                    pipe.send(None)
+                except OSError:
+                    pass
+                process.join(timeout=1)
+                self._stop_worker(process, pipe)
+            for pipe, (process, _) in starting.items():
+                self._stop_worker(process, pipe)
+            for pipe, (process, _, _) in busy.items():
+                self._stop_worker(process, pipe)
+    
+    def _start_worker(self):
+        parent_pipe, child_pipe = self.context.Pipe()
+        process = self.context.Process(target=_cv_worker_main, args=(child_pipe, self.db_path), daemon=True)
+        process.start()
+        child_pipe.close()
+        return process, parent_pipe
+    
+    @staticmethod
+    def _stop_worker(process, pipe):
+        if process.is_alive():
+            process.kill()
+        process.join()
+        pipe.close()
+
+
+def _cv_worker_main(pipe, db_path):
+    """Worker loop of CVExtractionPool: report ready, then parse the paths received until None"""
+    agent = CVParsingAgent(db_path)
+    # Load what parse_cv needs before the first file's timeout starts
+    PyPDF2.PdfReader
+    get_skill_matcher()
+    get_certification_matcher()
+    pipe.send('ready')
+    while True:
+        cv_path = pipe.recv()
+        if cv_path is None:
+            break
+        try:
+            pipe.send((agent.parse_cv(cv_path), None))
+        except Exception as e:
+            pipe.send((None, str(e)))
+
+
 # Agent 3: Candidate-Job Matcher
+# Weights of the match score components, a job_weights row replaces them for one job.
+# The certification component is already a bonus of at most 0.1.
+MATCH_COMPONENTS = ('skills', 'experience', 'education', 'certifications')
+DEFAULT_MATCH_WEIGHTS = (0.5, 0.3, 0.2, 1.0)
+
+
+def match_weights(weights, base=DEFAULT_MATCH_WEIGHTS):
+    """(skills, experience, education, certifications) weights from a dict, missing ones taken
+    from base, or None when one is not a non-negative number"""
+    merged = dict(zip(MATCH_COMPONENTS, base))
+    for component, weight in weights.items():
+        if component not in merged or isinstance(weight, bool) or not isinstance(weight, (int, float)) \
+                or not 0 <= weight < float('inf'):
+            return None
+        merged[component] = float(weight)
+    return tuple(merged[component] for component in MATCH_COMPONENTS)
+
+
+def load_job_weights(cursor, job_ids=None):
+    """job_id -> weights of the jobs that have their own profile, all of them when job_ids is None"""
+    # One row per customized job, small enough to read whole
+    cursor.execute("SELECT job_id, skills, experience, education, certifications FROM job_weights")
+    profiles = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+    if job_ids is not None:
+        profiles = {job_id: profiles[job_id] for job_id in job_ids if job_id in profiles}
+    return profiles
+
+
+def combine_match_components(skills_score, experience_score, edu_score, cert_bonus, weights=DEFAULT_MATCH_WEIGHTS):
+    """Weighted match score capped at 1.0, works on numbers and on numpy arrays"""
+    # Same evaluation order everywhere, so the batch, scalar and SQL scores are identical
+    final_score = (weights[0] * skills_score) + (weights[1] * experience_score) + \
+        (weights[2] * edu_score) + (weights[3] * cert_bonus)
+    return np.minimum(1.0, final_score) if isinstance(final_score, np.ndarray) else min(1.0, final_score)
+
+
 class CandidateMatcherAgent:
-    def __init__(self, db_path='recruitment.db'):
+    def __init__(self, db_path='recruitment.db', feature_store_path=None):
         self.db_path = db_path
+        self.db = get_database(db_path)
         self.threshold = 0.8  # Default matching threshold
+        # Matching sessions start from the memory-mapped features when a store path is given
+        self.feature_store = FeatureStore(feature_store_path) if feature_store_path else None
+        self._schema_checked = False
         
     def set_threshold(self, threshold):
         """Set the matching threshold (0.0-1.0)"""
@@ -452,11 +1996,33 @@ class CandidateMatcherAgent:
             return True
         return False
     
-    def match_candidates_to_job(self, job_id):
-        """Match all candidates to a specific job"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    @timed('matcher')
+    def match_candidates_to_job(self, job_id, session=None):
+        """Match all candidates to a specific job
+        
+        With a MatchingSession the candidates' features are not loaded again,
+        so matching many jobs one by one only loads them once.
+        """
+        # Read once, a concurrent set_threshold does not change this run
+        threshold = self.threshold
+        with self.db.transaction() as conn:
+            if session is not None:
+                return self._match_job_in_session(conn.cursor(), job_id, session, threshold)
+            return self._match_candidates_to_job(conn.cursor(), job_id, threshold)
+    
+    def _match_job_in_session(self, cursor, job_id, session, threshold):
+        jobs = self._load_job_inputs(cursor, [job_id])
+        if not jobs:
+            print(f"No job found with ID {job_id}")
+            return False
+        
+        engine = session.scoring_engine(jobs, weights=self._engine_weights(cursor, [job_id]))
+        for _, rows in engine.iter_match_rows():
+            self._save_match_scores(cursor, job_id, rows[0], threshold)
+        AGENT_ITEMS.inc(('matcher', 'pairs'), len(session.candidate_ids))
+        return True
+    
+    def _match_candidates_to_job(self, cursor, job_id, threshold):
         
         # Get job details
         cursor.execute("""
@@ -468,13 +2034,13 @@ class CandidateMatcherAgent:
         job = cursor.fetchone()
         if not job:
             print(f"No job found with ID {job_id}")
-            conn.close()
             return False
         
         # Load job requirements
         job_skills = json.loads(job['required_skills']) if job['required_skills'] else []
         job_experience = json.loads(job['experience']) if job['experience'] else []
         job_qualifications = json.loads(job['qualifications']) if job['qualifications'] else []
+        weights = load_job_weights(cursor, [job_id]).get(job_id, DEFAULT_MATCH_WEIGHTS)
         
         # Get all candidates
         cursor.execute("""
@@ -484,6 +2050,7 @@ class CandidateMatcherAgent:
         
         candidates = cursor.fetchall()
         
+        scores = []
         for candidate in candidates:
             # Load candidate qualifications
             candidate_skills = json.loads(candidate['skills']) if candidate['skills'] else []
@@ -491,43 +2058,335 @@ class CandidateMatcherAgent:
             candidate_education = json.loads(candidate['education']) if candidate['education'] else []
             candidate_certifications = json.loads(candidate['certifications']) if candidate['certifications'] else []
             
-            # Calculate match score
-            score = self.calculate_match_score(
+            # Calculate match score and keep its components
+            components = self.calculate_match_components(
                 job_skills, job_experience, job_qualifications,
                 candidate_skills, candidate_experience, candidate_education, candidate_certifications
             )
+            scores.append((candidate['id'], combine_match_components(*components, weights)) + components)
+        
+        self._save_match_scores(cursor, job_id, scores, threshold)
+        AGENT_ITEMS.inc(('matcher', 'pairs'), len(scores))
+        return True
+    
+    @timed('matcher')
+    def match_all_jobs(self, job_ids=None, tile_size=256, progress=None, session=None, workers=None,
+                       threshold=None):
+        """Match all candidates to many jobs at once using the batch scoring engine
+        
+        The candidates are those of session, loaded now when none is given.
+        progress is called with ('matching', jobs scored, total jobs) after every tile.
+        With workers > 1 the jobs are scored in that many processes while this
+        one writes the results, which are the same as with a single process.
+        Shortlists use threshold, or the agent's threshold when the run starts.
+        """
+        if threshold is None:
+            threshold = self.threshold
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
             
-            # Check if match already exists
-            cursor.execute("""
-            SELECT id FROM match_results
-            WHERE job_id = ? AND candidate_id = ?
-            """, (job_id, candidate['id']))
+            if session is None:
+                session = self._start_session(cursor)
+            # Read before loading: a job changed in between is matched again next time
+            jobs_generation = table_generation(cursor, 'job_descriptions')
+            jobs = self._load_job_inputs(cursor, job_ids)
+            engine = session.scoring_engine(jobs, tile_size=tile_size,
+                                            weights=self._engine_weights(cursor, [job[0] for job in jobs]),
+                                            workers=workers)
+            self._save_engine_scores(conn, cursor, engine, dict.fromkeys(engine.job_ids, threshold), progress)
+            
+            # Every candidate of the session has been scored against every job,
+            # ones changed since the session was loaded are above its generation
+            if job_ids is None:
+                advance_match_watermarks(cursor, {'job_descriptions': jobs_generation,
+                                                  'candidates': session.generation})
+        
+        return engine.job_ids
+    
+    @timed('matcher')
+    def match_incremental(self, tile_size=256, progress=None, workers=None, threshold=None):
+        """Score only the jobs and candidates inserted or changed since the last complete run
+        
+        New or changed jobs are scored against every candidate, new or changed
+        candidates against the other jobs, the rows being found through their
+        generation stamps. The generations matched up to are then recorded as
+        high-water marks, so a run with nothing changed only reads them.
+        Changed jobs are shortlisted at threshold; the new candidates of the
+        other jobs at the threshold those jobs were screened with, so every
+        job keeps a single threshold. Returns the ids of the jobs that got new
+        scores. workers and threshold are used as by match_all_jobs.
+        """
+        if threshold is None:
+            threshold = self.threshold
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
             
-            match_exists = cursor.fetchone()
+            marks = match_watermarks(cursor)
+            generations = {table: table_generation(cursor, table) for table in marks}
+            if generations == marks:
+                return []
             
-            # Insert or update match results
-            shortlisted = 1 if score >= self.threshold else 0
+            cursor.execute("SELECT id FROM job_descriptions WHERE feature_generation > ? ORDER BY id",
+                           (marks['job_descriptions'],))
+            changed_job_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT id FROM job_descriptions WHERE feature_generation <= ? ORDER BY id",
+                           (marks['job_descriptions'],))
+            other_job_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT id FROM candidates WHERE feature_generation > ? ORDER BY id",
+                           (marks['candidates'],))
+            changed_candidate_ids = [row[0] for row in cursor.fetchall()]
+            if not changed_candidate_ids:
+                other_job_ids = []
+            print(f"Incremental matching: {len(changed_job_ids)} new or changed jobs, "
+                  f"{len(changed_candidate_ids)} new or changed candidates")
             
-            if match_exists:
-                cursor.execute("""
-                UPDATE match_results
-                SET match_score = ?, shortlisted = ?
-                WHERE job_id = ? AND candidate_id = ?
-                """, (score, shortlisted, job_id, candidate['id']))
-            else:
+            total = len(changed_job_ids) + len(other_job_ids)
+            done = 0
+            report_progress(progress, 'matching', done, total)
+            if changed_job_ids:
+                engine = self._start_session(cursor).scoring_engine(
+                    self._load_job_inputs(cursor, changed_job_ids), tile_size=tile_size,
+                    weights=self._engine_weights(cursor, changed_job_ids), workers=workers)
+                done = self._save_engine_scores(conn, cursor, engine, dict.fromkeys(changed_job_ids, threshold),
+                                                progress, done, total)
+            if other_job_ids:
+                changed = MatchingSession(
+                    self._load_candidate_inputs(cursor, CandidateFeatures.from_lists, marks['candidates']))
+                engine = changed.scoring_engine(
+                    self._load_job_inputs(cursor, other_job_ids), tile_size=tile_size,
+                    weights=self._engine_weights(cursor, other_job_ids), workers=workers)
+                thresholds = dict.fromkeys(other_job_ids, threshold)
+                thresholds.update(load_job_thresholds(cursor, other_job_ids))
+                self._save_engine_scores(conn, cursor, engine, thresholds, progress, done, total)
+            
+            advance_match_watermarks(cursor, generations)
+        
+        return sorted(changed_job_ids + other_job_ids)
+    
+    def _save_engine_scores(self, conn, cursor, engine, thresholds, progress=None, done=0, total=None):
+        """Store the scores of every job of engine, shortlisted at thresholds[job_id],
+        returns done plus the number of jobs"""
+        if total is None:
+            total = done + len(engine.job_ids)
+        # Scores are produced a tile of jobs at a time so memory stays bounded,
+        # committing per tile keeps the write lock short for API readers
+        report_progress(progress, 'matching', done, total)
+        for tile_job_ids, tile_rows in engine.iter_match_rows():
+            for job_id, rows in zip(tile_job_ids, tile_rows):
+                self._save_match_scores(cursor, job_id, rows, thresholds[job_id])
+            conn.commit()
+            AGENT_ITEMS.inc(('matcher', 'pairs'), len(tile_job_ids) * len(engine.candidate_ids))
+            done += len(tile_job_ids)
+            report_progress(progress, 'matching', done, total)
+        return done
+    
+    def verify_batch_scores(self, job_ids=None):
+        """Compare batch engine scores with calculate_match_score, return the mismatching pairs
+        
+        The engine reads skills from the job_skills and candidate_skills link
+        tables while the scalar path reads the JSON columns, as
+        _match_candidates_to_job does, so a mismatch is either an arithmetic
+        difference or link tables that disagree with the JSON columns.
+        Returns (job_id, candidate_id, expected, score) tuples.
+        """
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            jobs, candidates = self._load_match_inputs(cursor, job_ids)
+            profiles = load_job_weights(cursor)
+            cursor.execute("SELECT id, required_skills, experience, qualifications FROM job_descriptions")
+            job_columns = {row['id']: self._json_lists(row, ('required_skills', 'experience', 'qualifications'))
+                           for row in cursor.fetchall()}
+            cursor.execute("SELECT id, skills, experience, education, certifications FROM candidates")
+            candidate_columns = {
+                row['id']: self._json_lists(row, ('skills', 'experience', 'education', 'certifications'))
+                for row in cursor.fetchall()}
+        
+        engine = BatchScoringEngine(jobs, candidates,
+                                    weights=[profiles.get(job[0], DEFAULT_MATCH_WEIGHTS) for job in jobs])
+        mismatches = []
+        for tile_job_ids, tile_scores in engine.iter_score_tiles():
+            for job_id, row in zip(tile_job_ids, tile_scores):
+                job_skills, job_experience, job_qualifications = job_columns[job_id]
+                for candidate_id, score in zip(engine.candidate_ids, row.tolist()):
+                    expected = self.calculate_match_score(
+                        job_skills, job_experience, job_qualifications, *candidate_columns[candidate_id],
+                        profiles.get(job_id, DEFAULT_MATCH_WEIGHTS)
+                    )
+                    if score != expected:
+                        mismatches.append((job_id, candidate_id, expected, score))
+        
+        return mismatches
+    
+    @staticmethod
+    def _json_lists(row, names):
+        return [json.loads(row[name]) if row[name] else [] for name in names]
+    
+    def _load_match_inputs(self, cursor, job_ids=None):
+        """Load (id, skills, qualifications) for jobs and (id, skills, experience, education, certifications) for candidates
+        
+        Skills come from the job_skills and candidate_skills link tables as
+        lowercase names, the other lists from their JSON columns.
+        """
+        return self._load_job_inputs(cursor, job_ids), self._load_candidate_inputs(cursor)
+    
+    def _load_job_inputs(self, cursor, job_ids=None):
+        """(id, skills, qualifications) of the given jobs, or of all jobs in id order"""
+        if job_ids is None:
+            cursor.execute("SELECT id, qualifications FROM job_descriptions ORDER BY id")
+            job_rows = cursor.fetchall()
+            cursor.execute("""
+            SELECT js.job_id, s.name, js.occurrences
+            FROM job_skills js
+            JOIN skills s ON s.id = js.skill_id
+            """)
+            job_skill_rows = cursor.fetchall()
+        else:
+            job_rows, job_skill_rows = [], []
+            for job_id in job_ids:
                 cursor.execute("""
-                INSERT INTO match_results (job_id, candidate_id, match_score, shortlisted, interview_sent)
-                VALUES (?, ?, ?, ?, 0)
-                """, (job_id, candidate['id'], score, shortlisted))
+                SELECT id, qualifications
+                FROM job_descriptions
+                WHERE id = ?
+                """, (job_id,))
+                row = cursor.fetchone()
+                if row:
+                    job_rows.append(row)
+                    cursor.execute("""
+                    SELECT js.job_id, s.name, js.occurrences
+                    FROM job_skills js
+                    JOIN skills s ON s.id = js.skill_id
+                    WHERE js.job_id = ?
+                    """, (job_id,))
+                    job_skill_rows.extend(cursor.fetchall())
         
-        conn.commit()
-        conn.close()
-        return True
+        # A skill listed n times by a job counts n times, as in calculate_match_score
+        job_skills = {}
+        for job_id, name, occurrences in job_skill_rows:
+            job_skills.setdefault(job_id, []).extend([name] * occurrences)
+        return [
+            (row['id'],
+             job_skills.get(row['id'], []),
+             json.loads(row['qualifications']) if row['qualifications'] else [])
+            for row in job_rows
+        ]
+    
+    def _load_candidate_inputs(self, cursor, record=None, since_generation=None):
+        """(id, skills, experience, education, certifications) of every candidate,
+        or record(id, skills, experience, education, certifications) when given.
+        
+        With since_generation only the candidates inserted or changed after
+        that generation of the candidates table are loaded.
+        """
+        # Every candidate refers to the dictionary's name strings instead of its own copies
+        skill_names = SkillDictionary(cursor).names
+        candidate_skills = {}
+        if since_generation is None:
+            cursor.execute("SELECT candidate_id, skill_id FROM candidate_skills")
+        else:
+            cursor.execute("""
+            SELECT cs.candidate_id, cs.skill_id
+            FROM candidates c
+            JOIN candidate_skills cs ON cs.candidate_id = c.id
+            WHERE c.feature_generation > ?
+            """, (since_generation,))
+        for candidate_id, skill_id in cursor.fetchall():
+            candidate_skills.setdefault(candidate_id, []).append(skill_names[skill_id])
+        
+        if since_generation is None:
+            cursor.execute("""
+            SELECT id, experience, education, certifications
+            FROM candidates
+            """)
+        else:
+            cursor.execute("""
+            SELECT id, experience, education, certifications
+            FROM candidates
+            WHERE feature_generation > ?
+            ORDER BY id
+            """, (since_generation,))
+        candidates = []
+        for row in cursor:
+            candidate = (row['id'],
+                         candidate_skills.get(row['id'], []),
+                         json.loads(row['experience']) if row['experience'] else [],
+                         json.loads(row['education']) if row['education'] else [],
+                         json.loads(row['certifications']) if row['certifications'] else [])
+            candidates.append(record(*candidate) if record else candidate)
+        return candidates
+    
+    @timed('matcher')
+    def start_session(self):
+        """Load the features of every candidate once for a matching run"""
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            return self._start_session(cursor)
+    
+    def _start_session(self, cursor):
+        if self.feature_store is not None:
+            features = self._sync_feature_store(cursor)
+            return MatchingSession(features, self.feature_store.generation)
+        # Read before loading, the features are at least this new
+        generation = table_generation(cursor, 'candidates')
+        return MatchingSession(self._load_candidate_inputs(cursor, CandidateFeatures.from_lists), generation)
+    
+    def sync_feature_store(self):
+        """Bring the feature store up to date with the database, return its CandidateFeatureMatrix"""
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            return self._sync_feature_store(cursor)
+    
+    def _sync_feature_store(self, cursor):
+        return self.feature_store.sync(
+            cursor, lambda since: self._load_candidate_inputs(cursor, CandidateFeatures.from_lists, since))
+    
+    def _engine_weights(self, cursor, job_ids):
+        """Weights of job_ids in order for a BatchScoringEngine"""
+        profiles = load_job_weights(cursor, job_ids)
+        return [profiles.get(job_id, DEFAULT_MATCH_WEIGHTS) for job_id in job_ids]
+    
+    def _save_match_scores(self, cursor, job_id, rows, threshold):
+        """Upsert match results of a job in one batch, shortlisting at threshold, rows are
+        (candidate_id, score, skills_score, experience_score, education_score, cert_bonus)"""
+        if not self._schema_checked:
+            migrate_database(cursor)
+            self._schema_checked = True
+        
+        cursor.execute("""
+        UPDATE job_descriptions SET shortlist_threshold = ?
+        WHERE id = ? AND shortlist_threshold IS NOT ?
+        """, (threshold, job_id, threshold))
+        cursor.executemany("""
+        INSERT INTO match_results (job_id, candidate_id, match_score, shortlisted, interview_sent,
+                                   skills_score, experience_score, education_score, cert_bonus)
+        VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)
+        ON CONFLICT (job_id, candidate_id) DO UPDATE SET
+            match_score = excluded.match_score,
+            shortlisted = excluded.shortlisted,
+            skills_score = excluded.skills_score,
+            experience_score = excluded.experience_score,
+            education_score = excluded.education_score,
+            cert_bonus = excluded.cert_bonus
+        """, [(job_id, candidate_id, score, 1 if score >= threshold else 0, *components)
+              for candidate_id, score, *components in rows])
     
     def calculate_match_score(self, job_skills, job_experience, job_qualifications,
-                              candidate_skills, candidate_experience, candidate_education, candidate_certifications):
+                              candidate_skills, candidate_experience, candidate_education, candidate_certifications,
+                              weights=DEFAULT_MATCH_WEIGHTS):
         """Calculate a match score between a candidate and job"""
-        # Skills match (50% weight)
+        return combine_match_components(*self.calculate_match_components(
+            job_skills, job_experience, job_qualifications,
+            candidate_skills, candidate_experience, candidate_education, candidate_certifications
+        ), weights)
+    
+    def calculate_match_components(self, job_skills, job_experience, job_qualifications,
+                                   candidate_skills, candidate_experience, candidate_education, candidate_certifications):
+        """(skills, experience, education, certification bonus) components of a match score"""
+        # Skills match (50% weight by default)
         skills_score = 0
         if job_skills and candidate_skills:
             matched_skills = 0
@@ -538,13 +2397,13 @@ class CandidateMatcherAgent:
             if job_skills:
                 skills_score = matched_skills / len(job_skills)
         
-        # Experience match (30% weight)
+        # Experience match (30% weight by default)
         experience_score = 0
         if candidate_experience:
             # Simple experience match - can be improved
             experience_score = min(1.0, len(candidate_experience) / 2)  # Assume 2+ experiences is good
         
-        # Education/qualifications match (20% weight)
+        # Education/qualifications match (20% weight by default)
         edu_score = 0
         if job_qualifications and candidate_education:
             # Check for degree matches
@@ -561,17 +2420,158 @@ class CandidateMatcherAgent:
         # Bonus for certifications (up to 10% bonus)
         cert_bonus = min(0.1, len(candidate_certifications) * 0.02)
         
-        # Calculate weighted score
-        final_score = (0.5 * skills_score) + (0.3 * experience_score) + (0.2 * edu_score) + cert_bonus
+        return skills_score, experience_score, edu_score, cert_bonus
+    
+    @timed('matcher')
+    def rethreshold(self, threshold, job_id=None):
+        """Recompute the shortlisted flags of one job, or of all jobs, from the stored scores.
+        
+        Nothing is re-scored: one set-based UPDATE writes only the rows whose
+        flag changes. The agent's own threshold is left alone. Returns the
+        number of rows changed, None when the threshold is not between 0 and 1
+        or job_id is not an integer.
+        """
+        if not valid_threshold(threshold) or not (job_id is None or valid_id(job_id)):
+            return None
+        
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            return self._rethreshold(cursor, threshold, job_id)
+    
+    def _rethreshold(self, cursor, threshold, job_id=None):
+        if job_id is None:
+            cursor.execute("UPDATE job_descriptions SET shortlist_threshold = ?", (threshold,))
+            cursor.execute("""
+            UPDATE match_results
+            SET shortlisted = (match_score >= ?)
+            WHERE shortlisted IS NOT (match_score >= ?)
+            """, (threshold, threshold))
+        else:
+            cursor.execute("UPDATE job_descriptions SET shortlist_threshold = ? WHERE id = ?", (threshold, job_id))
+            cursor.execute("""
+            UPDATE match_results
+            SET shortlisted = (match_score >= ?)
+            WHERE job_id = ? AND shortlisted IS NOT (match_score >= ?)
+            """, (threshold, job_id, threshold))
+        return cursor.rowcount
+    
+    def get_job_weights(self, job_id):
+        """Component weights of a job, the defaults unless it has its own profile"""
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            weights = load_job_weights(cursor, [job_id]).get(job_id, DEFAULT_MATCH_WEIGHTS)
+        return dict(zip(MATCH_COMPONENTS, weights))
+    
+    def _weights_and_threshold(self, cursor, job_id, weights, threshold):
+        """Weights merged into the job's profile and the threshold to shortlist at, the job's
+        stored one when threshold is None; None for either when it is invalid or unknown"""
+        weights = match_weights(weights, load_job_weights(cursor, [job_id]).get(job_id, DEFAULT_MATCH_WEIGHTS))
+        if threshold is None:
+            threshold = load_job_thresholds(cursor, [job_id]).get(job_id)
+        return weights, threshold if valid_threshold(threshold) else None
+    
+    @timed('matcher')
+    def set_job_weights(self, job_id, weights, threshold=None):
+        """Store a weight profile for a job and rescore its matches from the stored components.
+        
+        One set-based UPDATE recomputes the scores and another the shortlisted
+        flags; no candidate is read. The shortlist is rebuilt at the threshold
+        the job was screened with, or at threshold which then becomes the job's.
+        Matches stored before their components keep their score until the
+        next matching run. Returns the number of matches rescored, None when a
+        weight or the threshold is invalid, or no threshold is given for a job
+        screened before thresholds were stored.
+        """
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            weights, threshold = self._weights_and_threshold(cursor, job_id, weights, threshold)
+            if weights is None or threshold is None:
+                return None
+            
+            cursor.execute("""
+            INSERT INTO job_weights (job_id, skills, experience, education, certifications)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (job_id) DO UPDATE SET
+                skills = excluded.skills,
+                experience = excluded.experience,
+                education = excluded.education,
+                certifications = excluded.certifications
+            """, (job_id,) + weights)
+            # Same expression as combine_match_components
+            cursor.execute("""
+            UPDATE match_results
+            SET match_score = MIN(1.0, (? * skills_score) + (? * experience_score) +
+                                       (? * education_score) + (? * cert_bonus))
+            WHERE job_id = ? AND skills_score IS NOT NULL
+            """, weights + (job_id,))
+            rescored = cursor.rowcount
+            self._rethreshold(cursor, threshold, job_id)
+        return rescored
+    
+    @timed('matcher')
+    def preview_job_weights(self, job_id, weights, k=10, threshold=None):
+        """Shortlist size and k best candidates of a job under other weights, nothing is written.
+        
+        The scores are recomputed with numpy from the stored components and
+        counted against threshold, by default the one the job was screened
+        with. Returns None as set_job_weights does.
+        """
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            weights, threshold = self._weights_and_threshold(cursor, job_id, weights, threshold)
+            if weights is None or threshold is None:
+                return None
+            
+            cursor.execute("""
+            SELECT candidate_id, skills_score, experience_score, education_score, cert_bonus
+            FROM match_results
+            WHERE job_id = ? AND skills_score IS NOT NULL
+            """, (job_id,))
+            rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, 5)
+            scores = combine_match_components(rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4], weights)
+            best = [(int(rows[i, 0]), float(scores[i])) for i in top_k(scores, k)]
+            
+            details = {}
+            if best:
+                placeholders = ', '.join('?' * len(best))
+                cursor.execute(f"SELECT id, name, email FROM candidates WHERE id IN ({placeholders})",
+                               [candidate_id for candidate_id, _ in best])
+                details = {row['id']: dict(row) for row in cursor.fetchall()}
+        return {
+            'weights': dict(zip(MATCH_COMPONENTS, weights)),
+            'threshold': threshold,
+            'total': len(scores),
+            'shortlisted': int(np.count_nonzero(scores >= threshold)),
+            'candidates': [dict(details[candidate_id], match_score=score) for candidate_id, score in best
+                           if candidate_id in details]
+        }
+    
+    @timed('matcher')
+    def threshold_sweep(self, thresholds, job_id=None):
+        """(number of scored pairs, [(threshold, shortlist size)]) for every threshold.
         
-        # Cap at 1.0
-        return min(1.0, final_score)
+        All thresholds are counted in one pass over the stored scores; for a
+        job the pass only reads its range of idx_match_results_job_shortlist.
+        """
+        thresholds = [float(threshold) for threshold in thresholds]
+        counts = ''.join(', SUM(match_score >= ?)' for _ in thresholds)
+        cursor = self.db.connection().cursor()
+        if job_id is None:
+            cursor.execute(f"SELECT COUNT(*){counts} FROM match_results", thresholds)
+        else:
+            cursor.execute(f"SELECT COUNT(*){counts} FROM match_results WHERE job_id = ?", thresholds + [job_id])
+        row = cursor.fetchone()
+        # SUM over no rows is NULL
+        return row[0], [(threshold, count or 0) for threshold, count in zip(thresholds, row[1:])]
     
+    @timed('matcher')
     def get_shortlisted_candidates(self, job_id):
         """Get all shortlisted candidates for a job"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self.db.connection().cursor()
         
         cursor.execute("""
         SELECT c.id, c.name, c.email, m.match_score
@@ -582,28 +2582,706 @@ class CandidateMatcherAgent:
         """, (job_id,))
         
         shortlisted = cursor.fetchall()
-        conn.close()
         
         return [dict(candidate) for candidate in shortlisted]
+    
+    @timed('matcher')
+    def top_candidates(self, job_id, k=10, session=None):
+        """The k best candidates for a job, scored on the fly without touching match_results"""
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            jobs = self._load_job_inputs(cursor, [job_id])
+            if not jobs:
+                print(f"No job found with ID {job_id}")
+                return []
+            
+            if session is None:
+                session = self._start_session(cursor)
+            best = session.scoring_engine(jobs, weights=self._engine_weights(cursor, [job_id])).top_k(0, k)
+            if not best:
+                return []
+            
+            # Only the k winners are looked up
+            placeholders = ', '.join('?' * len(best))
+            cursor.execute(f"SELECT id, name, email FROM candidates WHERE id IN ({placeholders})",
+                           [candidate_id for candidate_id, _ in best])
+            details = {row['id']: dict(row) for row in cursor.fetchall()}
+        return [dict(details[candidate_id], match_score=score) for candidate_id, score in best]
+    
+    @timed('matcher')
+    def top_jobs(self, skills, experience, education, certifications, k=10):
+        """(job_id, score) of the k best jobs for one candidate's parsed CV, best first"""
+        job_ids, scores = self._score_jobs(skills, experience, education, certifications)
+        return [(job_ids[i], float(scores[i])) for i in top_k(scores, k)]
+    
+    def job_scores(self, skills, experience, education, certifications):
+        """(job_id, score) of every job for one candidate's parsed CV, in job order"""
+        job_ids, scores = self._score_jobs(skills, experience, education, certifications)
+        return list(zip(job_ids, scores.tolist()))
+    
+    def _score_jobs(self, skills, experience, education, certifications):
+        # Each job is scored with its own weights, as in a matching run
+        job_features = get_job_features(self.db_path)
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+            migrate_database(cursor)
+            weights = self._engine_weights(cursor, job_features.job_ids)
+        engine = BatchScoringEngine(job_features, [(None, skills, experience, education, certifications)],
+                                    weights=weights)
+        return engine.job_ids, engine.score_matrix()[:, 0]
+
+
+# Candidate features shared by the jobs of one matching run
+class MatchingSession:
+    """Candidate features loaded and normalized once and reused for every job of a run"""
+    def __init__(self, candidates, generation=None):
+        # candidates: a CandidateFeatureMatrix or the records to build one from
+        # generation: generation of the candidates table the features reflect, None when unknown
+        self.started = time.perf_counter()
+        if not isinstance(candidates, CandidateFeatureMatrix):
+            candidates = CandidateFeatureMatrix(candidates)
+        self.candidates = candidates
+        self.candidate_ids = self.candidates.candidate_ids
+        self.generation = generation
+    
+    def scoring_engine(self, jobs, tile_size=256, weights=None, workers=None):
+        """BatchScoringEngine for jobs against the session's candidates,
+        a ShardedScoringEngine with workers > 1 and more than one job"""
+        if workers and workers > 1 and len(jobs) > 1:
+            return ShardedScoringEngine(jobs, self.candidates, tile_size=tile_size, weights=weights, workers=workers)
+        return BatchScoringEngine(jobs, self.candidates, tile_size=tile_size, weights=weights)
+    
+    def report(self):
+        """Seconds since the session was loaded and the peak memory of the process"""
+        return {'seconds': time.perf_counter() - self.started, 'peak_memory_mb': peak_memory_mb()}
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process in MB, None without the resource module (Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# Batch scoring engine used by CandidateMatcherAgent
+class BatchScoringEngine:
+    """Vectorized version of CandidateMatcherAgent.calculate_match_score.
+    
+    Job and candidate features are turned into sparse matrices once and the
+    score matrix is then computed a tile of jobs at a time, which gives the
+    same scores as the scalar version without scoring pairs one by one.
+    """
+    def __init__(self, jobs, candidates, tile_size=256, weights=None):
+        # jobs: (id, skills, qualifications) or a prebuilt JobFeatureMatrix
+        # candidates: CandidateFeatures, (id, skills, experience, education, certifications)
+        # or a prebuilt CandidateFeatureMatrix
+        # weights: component weights per job, DEFAULT_MATCH_WEIGHTS for all jobs when None
+        self.tile_size = max(1, tile_size)
+        job_features = jobs if isinstance(jobs, JobFeatureMatrix) else JobFeatureMatrix(jobs)
+        if not isinstance(candidates, CandidateFeatureMatrix):
+            candidates = CandidateFeatureMatrix(candidates)
+        self.job_ids = job_features.job_ids
+        self.candidate_ids = candidates.candidate_ids
+        if weights is None:
+            weights = [DEFAULT_MATCH_WEIGHTS] * len(self.job_ids)
+        # (n_jobs, 4), one column per component
+        self.weights = np.array(weights, dtype=np.float64).reshape(len(self.job_ids), len(MATCH_COMPONENTS))
+        self.experience_scores = candidates.experience_scores
+        self.cert_bonus = candidates.cert_bonus
+        
+        self.job_skill_counts = job_features.skill_counts
+        self.job_skill_lengths = job_features.skill_lengths
+        self.job_qual_counts = job_features.qual_counts
+        self.job_qual_lengths = job_features.qual_lengths
+        
+        # For every job term, which candidates have a term containing it
+        self.skill_hits = self._binarize(
+            self._containment(job_features.skill_terms, candidates.skill_terms) @ candidates.skill_matrix)
+        self.qual_hits = self._binarize(
+            self._containment(job_features.qual_terms, candidates.degree_terms) @ candidates.degree_matrix)
+    
+    def iter_score_tiles(self):
+        """Yield (job_ids, scores) where scores is a (len(job_ids), n_candidates) array"""
+        for start in range(0, len(self.job_ids), self.tile_size):
+            stop = min(start + self.tile_size, len(self.job_ids))
+            yield self.job_ids[start:stop], self.score_jobs(start, stop)
+    
+    def score_matrix(self):
+        """Compute the full (n_jobs, n_candidates) score matrix"""
+        scores = np.zeros((len(self.job_ids), len(self.candidate_ids)))
+        for start in range(0, len(self.job_ids), self.tile_size):
+            stop = min(start + self.tile_size, len(self.job_ids))
+            scores[start:stop] = self.score_jobs(start, stop)
+        return scores
+    
+    def iter_match_rows(self):
+        """Yield (job_ids, rows) per tile, rows holding for every job the
+        (candidate_id, score, skills, experience, education, certification) tuples to store"""
+        experience_scores = self.experience_scores.tolist()
+        cert_bonus = self.cert_bonus.tolist()
+        for start in range(0, len(self.job_ids), self.tile_size):
+            stop = min(start + self.tile_size, len(self.job_ids))
+            skills_score, edu_score = self.score_components(start, stop)
+            scores = self._combine(start, stop, skills_score, edu_score)
+            yield self.job_ids[start:stop], self.match_rows(
+                self.candidate_ids, experience_scores, cert_bonus, scores, skills_score, edu_score)
+    
+    @staticmethod
+    def match_rows(candidate_ids, experience_scores, cert_bonus, scores, skills_score, edu_score):
+        """Rows to store for every job of a tile from its score and component matrices"""
+        return [
+            list(zip(candidate_ids, job_scores.tolist(), job_skills.tolist(), experience_scores,
+                     job_edu.tolist(), cert_bonus))
+            for job_scores, job_skills, job_edu in zip(scores, skills_score, edu_score)
+        ]
+    
+    def score_jobs(self, start, stop):
+        """Scores for the jobs at positions start..stop against all candidates"""
+        return self._combine(start, stop, *self.score_components(start, stop))
+    
+    def score_components(self, start, stop):
+        """(skills, education) component matrices of the jobs at positions start..stop,
+        the experience and certification components only depend on the candidate"""
+        skills_score = self._fraction_matched(
+            self.job_skill_counts[start:stop], self.skill_hits, self.job_skill_lengths[start:stop])
+        edu_score = self._fraction_matched(
+            self.job_qual_counts[start:stop], self.qual_hits, self.job_qual_lengths[start:stop])
+        return skills_score, edu_score
+    
+    def _combine(self, start, stop, skills_score, edu_score):
+        # One weight column per job, broadcast over the candidates
+        weights = [self.weights[start:stop, i:i + 1] for i in range(len(MATCH_COMPONENTS))]
+        return combine_match_components(skills_score, self.experience_scores, edu_score, self.cert_bonus, weights)
+    
+    def top_k(self, job_position, k):
+        """(candidate_id, score) of the k best candidates for the job at job_position, best first"""
+        scores = self.score_jobs(job_position, job_position + 1)[0]
+        return [(self.candidate_ids[i], float(scores[i])) for i in top_k(scores, k)]
+    
+    @staticmethod
+    def _fraction_matched(job_counts, hits, lengths):
+        matched = (job_counts @ hits).toarray()
+        return matched / np.maximum(lengths, 1)[:, None]
+    
+    @staticmethod
+    def _containment(needles, haystack):
+        """Sparse (len(needles), len(haystack)) indicator of needle in haystack term"""
+        # Search every needle once in the joined haystack instead of pair by pair
+        text = '\x00'.join(haystack)
+        starts = []
+        position = 0
+        for term in haystack:
+            starts.append(position)
+            position += len(term) + 1
+        
+        rows, cols = [], []
+        for row, needle in enumerate(needles):
+            if not needle:
+                # The empty string is contained in every term
+                rows.extend([row] * len(haystack))
+                cols.extend(range(len(haystack)))
+                continue
+            
+            position = text.find(needle)
+            while position != -1:
+                col = bisect_right(starts, position) - 1
+                if position + len(needle) <= starts[col] + len(haystack[col]):
+                    rows.append(row)
+                    cols.append(col)
+                    # One hit per term is enough, continue with the next term
+                    if col + 1 >= len(starts):
+                        break
+                    position = text.find(needle, starts[col + 1])
+                else:
+                    position = text.find(needle, position + 1)
+        
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(needles), len(haystack)))
+    
+    @staticmethod
+    def _binarize(matrix):
+        matrix = matrix.tocsr()
+        matrix.data = np.ones_like(matrix.data)
+        return matrix
+
+
+# Start method of worker processes
+def worker_context():
+    """multiprocessing context for worker processes started by the agents.
+    
+    The agents run on TaskRunner and request threads, and forking a process
+    with other threads copies whatever locks they hold (SQLite, logging,
+    BLAS) into the child. Workers are started by a forkserver instead, or
+    spawned where there is none (Windows).
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+# Process pool used by CandidateMatcherAgent to score jobs on several cores
+class ShardedScoringEngine:
+    """BatchScoringEngine with the tiles of jobs scored in worker processes.
+    
+    Workers are started from worker_context(). When the candidate features
+    are mapped from a FeatureStore, every worker maps the same file read-only
+    and the workers share its pages; other features are pickled to each
+    worker once when the pool starts. Each worker scores a shard of jobs with a
+    BatchScoringEngine, so the scores are exactly those of the serial path,
+    and the caller stays the single writer: shards are yielded in job order
+    with at most two per worker in flight.
+    """
+    def __init__(self, jobs, candidates, tile_size=256, weights=None, workers=None):
+        # jobs: (id, skills, qualifications), candidates: a CandidateFeatureMatrix
+        self.jobs = list(jobs)
+        self.candidates = candidates
+        self.job_ids = [job[0] for job in self.jobs]
+        self.candidate_ids = candidates.candidate_ids
+        self.weights = list(weights) if weights is not None else [DEFAULT_MATCH_WEIGHTS] * len(self.jobs)
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(self.jobs)))
+        # Several shards per worker even for few jobs, so a slow shard does not idle the others
+        self.tile_size = max(1, min(tile_size, -(-len(self.jobs) // (self.workers * 4))))
+    
+    def iter_match_rows(self):
+        """Yield (job_ids, rows) per shard like BatchScoringEngine.iter_match_rows"""
+        if not self.jobs:
+            return
+        experience_scores = self.candidates.experience_scores.tolist()
+        cert_bonus = self.candidates.cert_bonus.tolist()
+        starts = iter(range(0, len(self.jobs), self.tile_size))
+        in_flight = deque()
+        
+        # Only the file name is sent for features mapped from a FeatureStore
+        source = self.candidates.source
+        initargs = (None, source) if source is not None else (self.candidates, None)
+        with worker_context().Pool(self.workers, initializer=_scoring_worker_init, initargs=initargs) as pool:
+            def submit():
+                start = next(starts, None)
+                if start is not None:
+                    stop = start + self.tile_size
+                    in_flight.append((start, stop, pool.apply_async(
+                        _scoring_worker_score, (self.jobs[start:stop], self.weights[start:stop]))))
+            
+            for _ in range(self.workers * 2):
+                submit()
+            while in_flight:
+                start, stop, result = in_flight.popleft()
+                scores, skills_score, edu_score = result.get()
+                submit()
+                yield self.job_ids[start:stop], BatchScoringEngine.match_rows(
+                    self.candidate_ids, experience_scores, cert_bonus, scores, skills_score, edu_score)
+
+
+_scoring_worker_candidates = None
+
+
+def _scoring_worker_init(candidates, source=None):
+    """Pool initializer of ShardedScoringEngine: keep the candidate features, or map them
+    read-only from source, the (FeatureStore path, generation) they were loaded from"""
+    global _scoring_worker_candidates
+    if source is not None:
+        path, generation = source
+        stored = FeatureStore(path).load()
+        # Another process may have synced a newer generation into the file since
+        candidates = stored[1] if stored is not None and stored[0] == generation else None
+    _scoring_worker_candidates = candidates
+
+
+def _scoring_worker_score(jobs, weights):
+    """Score and component matrices of a shard of jobs against the shared candidates"""
+    if _scoring_worker_candidates is None:
+        raise RuntimeError("The feature store was replaced while the scoring workers started, match again")
+    engine = BatchScoringEngine(jobs, _scoring_worker_candidates, tile_size=len(jobs), weights=weights)
+    skills_score, edu_score = engine.score_components(0, len(jobs))
+    return engine._combine(0, len(jobs), skills_score, edu_score), skills_score, edu_score
+
+
+class CandidateFeatures:
+    """Matching features of one candidate, normalized once when loaded.
+    
+    Only what the score uses is kept: lowercase skills and degrees and the
+    number of experience and certification entries.
+    """
+    __slots__ = ('id', 'skills', 'degrees', 'experience_count', 'certification_count')
+    
+    def __init__(self, candidate_id, skills, degrees, experience_count, certification_count):
+        self.id = candidate_id
+        self.skills = skills
+        self.degrees = degrees
+        self.experience_count = experience_count
+        self.certification_count = certification_count
+    
+    @classmethod
+    def from_lists(cls, candidate_id, skills, experience, education, certifications):
+        return cls(candidate_id,
+                   tuple(skill.lower() for skill in skills),
+                   tuple(edu.get('degree', '').lower() for edu in education),
+                   len(experience), len(certifications))
+
+
+class CandidateFeatureMatrix:
+    """Candidate side of the BatchScoringEngine, built once and reused for any set of jobs"""
+    def __init__(self, candidates):
+        # candidates: CandidateFeatures or (id, skills, experience, education, certifications)
+        records = [candidate if isinstance(candidate, CandidateFeatures) else CandidateFeatures.from_lists(*candidate)
+                   for candidate in candidates]
+        
+        # Skill and degree indicators, experience and certification counts
+        skill_terms, skill_rows = self.term_rows([record.skills for record in records])
+        degree_terms, degree_rows = self.term_rows([record.degrees for record in records])
+        self._set_features(
+            [record.id for record in records], skill_terms, skill_rows, degree_terms, degree_rows,
+            np.array([record.experience_count for record in records], dtype=np.int64),
+            np.array([record.certification_count for record in records], dtype=np.int64))
+    
+    @classmethod
+    def from_arrays(cls, candidate_ids, skill_terms, skill_rows, degree_terms, degree_rows,
+                    experience_counts, certification_counts):
+        """Wrap prebuilt arrays, such as the memory-mapped ones of a FeatureStore, without copying them"""
+        matrix = cls.__new__(cls)
+        matrix._set_features(candidate_ids, skill_terms, skill_rows, degree_terms, degree_rows,
+                             experience_counts, certification_counts)
+        return matrix
+    
+    def _set_features(self, candidate_ids, skill_terms, skill_rows, degree_terms, degree_rows,
+                      experience_counts, certification_counts):
+        # *_rows are (n_candidates, n_terms) 0/1 CSR matrices, the engine uses their
+        # (n_terms, n_candidates) transposes, which share the same arrays
+        self.candidate_ids = candidate_ids
+        self.skill_terms, self.skill_rows, self.skill_matrix = skill_terms, skill_rows, skill_rows.T
+        self.degree_terms, self.degree_rows, self.degree_matrix = degree_terms, degree_rows, degree_rows.T
+        self.experience_counts = experience_counts
+        self.certification_counts = certification_counts
+        self.experience_scores = np.minimum(1.0, experience_counts / 2)
+        self.cert_bonus = np.minimum(0.1, certification_counts * 0.02)
+        # (FeatureStore path, generation) when the arrays are mapped from a store file
+        self.source = None
+    
+    @staticmethod
+    def term_rows(term_lists, vocabulary=None):
+        """Build an (n_candidates, n_terms) 0/1 CSR matrix and its term vocabulary.
+        
+        New terms are appended to vocabulary (term -> column) when one is given.
+        """
+        vocabulary = {} if vocabulary is None else vocabulary
+        indptr, indices = [0], []
+        for terms in term_lists:
+            indices.extend(sorted(vocabulary.setdefault(term, len(vocabulary)) for term in set(terms)))
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(indices)), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(term_lists), len(vocabulary)))
+        return list(vocabulary), matrix
+
+
+class JobFeatureMatrix:
+    """Job side of the BatchScoringEngine, built once and reused for any set of candidates"""
+    def __init__(self, jobs):
+        # jobs: (id, skills, qualifications)
+        self.job_ids = [job[0] for job in jobs]
+        # Term counts (repeated terms count once per occurrence, as in the scalar loop)
+        self.skill_terms, self.skill_counts, self.skill_lengths = self._job_term_matrix(
+            [[skill.lower() for skill in job[1]] for job in jobs])
+        self.qual_terms, self.qual_counts, self.qual_lengths = self._job_term_matrix(
+            [[qual.lower() for qual in job[2]] for job in jobs])
+    
+    @staticmethod
+    def _job_term_matrix(term_lists):
+        """Build a (n_jobs, n_terms) count matrix, its vocabulary and the list length per job"""
+        vocabulary = {}
+        rows, cols = [], []
+        for row, terms in enumerate(term_lists):
+            for term in terms:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(term, len(vocabulary)))
+        # Duplicate (row, col) entries are summed, so repeated terms are counted
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(term_lists), len(vocabulary)))
+        lengths = np.array([len(terms) for terms in term_lists], dtype=np.float64)
+        return list(vocabulary), matrix, lengths
+
+
+# Memory-mapped candidate features reused across matching runs
+class FeatureStore:
+    """CandidateFeatureMatrix arrays persisted in one binary file that is memory-mapped read-only.
+    
+    A new worker or CLI run maps the file instead of rebuilding the features
+    from the JSON columns, and processes mapping it share its pages. The file is
+    stamped with the generation of the candidates table: sync() only reloads
+    the candidates changed since then and writes a new file next to the old
+    one, swapped in with os.replace so open mappings stay valid.
+    
+    Layout: MAGIC, the header length as little-endian uint64, the JSON header
+    (format version, generation, term vocabularies and an offset, dtype and
+    shape per array) and the arrays, each aligned to ALIGNMENT bytes.
+    """
+    MAGIC = b'MMFEATS\x00'
+    FORMAT_VERSION = 1
+    ALIGNMENT = 64
+    ARRAYS = ('candidate_ids', 'skill_indptr', 'skill_indices', 'degree_indptr', 'degree_indices',
+              'experience_counts', 'certification_counts')
+    
+    def __init__(self, path):
+        self.path = path
+        self.generation = None
+        self.changed = 0  # candidates reloaded by the last sync
+    
+    def load(self):
+        """(generation, CandidateFeatureMatrix) mapped from the file, None when it is missing or outdated"""
+        try:
+            with open(self.path, 'rb') as f:
+                magic, header_length = struct.unpack('<8sQ', f.read(16))
+                if magic != self.MAGIC:
+                    return None
+                header = json.loads(f.read(header_length))
+        except (OSError, struct.error, ValueError):
+            return None
+        if header.get('format_version') != self.FORMAT_VERSION:
+            return None
+        
+        data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        start = self._aligned(16 + header_length)
+        arrays = {}
+        for name, (offset, dtype, shape) in header['arrays'].items():
+            dtype = np.dtype(dtype)
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            arrays[name] = data[start + offset:start + offset + nbytes].view(dtype).reshape(shape)
+        
+        n_candidates = len(arrays['candidate_ids'])
+        skill_rows = sparse.csr_matrix(
+            (np.ones(len(arrays['skill_indices'])), arrays['skill_indices'], arrays['skill_indptr']),
+            shape=(n_candidates, len(header['skill_terms'])), copy=False)
+        degree_rows = sparse.csr_matrix(
+            (np.ones(len(arrays['degree_indices'])), arrays['degree_indices'], arrays['degree_indptr']),
+            shape=(n_candidates, len(header['degree_terms'])), copy=False)
+        features = CandidateFeatureMatrix.from_arrays(
+            arrays['candidate_ids'].tolist(), header['skill_terms'], skill_rows, header['degree_terms'], degree_rows,
+            arrays['experience_counts'], arrays['certification_counts'])
+        features.source = (os.path.abspath(self.path), header['generation'])
+        return header['generation'], features
+    
+    def sync(self, cursor, load_changed):
+        """CandidateFeatureMatrix matching the database, updating the file first if it is behind.
+        
+        load_changed(generation) returns the CandidateFeatures, in id order, of
+        the candidates inserted or changed after generation (all of them for -1).
+        Run it inside Database.transaction() so every read sees the same snapshot.
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+        generation = table_generation(cursor, 'candidates')
+        stored = self.load()
+        if stored is not None and stored[0] == generation:
+            self.generation, self.changed = generation, 0
+            return stored[1]
+        
+        # A file newer than the database belongs to another copy of it
+        since = stored[0] if stored is not None and stored[0] < generation else -1
+        changed = load_changed(since)
+        cursor.execute("SELECT id FROM candidates ORDER BY id")
+        candidate_ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+        features = self._merge(stored[1] if since >= 0 else None, changed, candidate_ids)
+        self._write(generation, features)
+        self.generation, self.changed = generation, len(changed)
+        return self.load()[1]
+    
+    @staticmethod
+    def _merge(previous, changed, candidate_ids):
+        """CandidateFeatureMatrix of candidate_ids: changed records replace or extend previous ones.
+        
+        The vocabularies only grow, terms nobody has any more are kept until
+        the next full rebuild.
+        """
+        changed_ids = np.array([record.id for record in changed], dtype=np.int64)
+        if previous is None:
+            kept_positions = np.array([], dtype=np.int64)
+            skill_vocabulary, degree_vocabulary = {}, {}
+        else:
+            previous_ids = np.asarray(previous.candidate_ids, dtype=np.int64)
+            # Unchanged candidates that still exist keep their rows
+            kept_positions = np.flatnonzero(np.isin(previous_ids, candidate_ids) &
+                                            ~np.isin(previous_ids, changed_ids))
+            skill_vocabulary = {term: i for i, term in enumerate(previous.skill_terms)}
+            degree_vocabulary = {term: i for i, term in enumerate(previous.degree_terms)}
+        
+        skill_terms, changed_skills = CandidateFeatureMatrix.term_rows(
+            [record.skills for record in changed], skill_vocabulary)
+        degree_terms, changed_degrees = CandidateFeatureMatrix.term_rows(
+            [record.degrees for record in changed], degree_vocabulary)
+        experience_counts = np.array([record.experience_count for record in changed], dtype=np.int64)
+        certification_counts = np.array([record.certification_count for record in changed], dtype=np.int64)
+        if previous is not None:
+            def stack(previous_rows, rows, n_terms):
+                # The kept rows get the columns of the grown vocabulary
+                kept = previous_rows[kept_positions]
+                kept = sparse.csr_matrix((kept.data, kept.indices, kept.indptr), shape=(len(kept_positions), n_terms))
+                return sparse.vstack([kept, rows], format='csr')
+            changed_skills = stack(previous.skill_rows, changed_skills, len(skill_terms))
+            changed_degrees = stack(previous.degree_rows, changed_degrees, len(degree_terms))
+            changed_ids = np.concatenate([previous_ids[kept_positions], changed_ids])
+            experience_counts = np.concatenate([previous.experience_counts[kept_positions], experience_counts])
+            certification_counts = np.concatenate([previous.certification_counts[kept_positions],
+                                                   certification_counts])
+        
+        # Rows inserted after the id list was read are left for the next sync
+        order = np.argsort(changed_ids, kind='stable')
+        order = order[np.isin(changed_ids[order], candidate_ids)]
+        return CandidateFeatureMatrix.from_arrays(
+            changed_ids[order].tolist(), skill_terms, changed_skills[order], degree_terms, changed_degrees[order],
+            experience_counts[order], certification_counts[order])
+    
+    def _write(self, generation, features):
+        # scipy keeps 32-bit index arrays as they are, so the mapped arrays are used without a copy
+        index_dtype = np.int32 if max(features.skill_rows.nnz, features.degree_rows.nnz,
+                                      len(features.skill_terms), len(features.degree_terms)) < 2 ** 31 else np.int64
+        arrays = {
+            'candidate_ids': np.asarray(features.candidate_ids, dtype=np.int64),
+            'skill_indptr': features.skill_rows.indptr.astype(index_dtype),
+            'skill_indices': features.skill_rows.indices.astype(index_dtype),
+            'degree_indptr': features.degree_rows.indptr.astype(index_dtype),
+            'degree_indices': features.degree_rows.indices.astype(index_dtype),
+            'experience_counts': np.asarray(features.experience_counts, dtype=np.int64),
+            'certification_counts': np.asarray(features.certification_counts, dtype=np.int64)
+        }
+        
+        layout, offset = {}, 0
+        for name in self.ARRAYS:
+            layout[name] = (offset, arrays[name].dtype.str, list(arrays[name].shape))
+            offset = self._aligned(offset + arrays[name].nbytes)
+        header = json.dumps({
+            'format_version': self.FORMAT_VERSION,
+            'generation': generation,
+            'skill_terms': features.skill_terms,
+            'degree_terms': features.degree_terms,
+            'arrays': layout
+        }).encode('utf-8')
+        
+        # Written next to the file and renamed over it, readers never see a partial file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(struct.pack('<8sQ', self.MAGIC, len(header)))
+                f.write(header)
+                start = self._aligned(16 + len(header))
+                for name in self.ARRAYS:
+                    f.seek(start + layout[name][0])
+                    f.write(np.ascontiguousarray(arrays[name]).tobytes())
+                f.truncate(start + offset)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    @classmethod
+    def _aligned(cls, offset):
+        return -(-offset // cls.ALIGNMENT) * cls.ALIGNMENT
+
+
+def top_k(scores, k):
+    """Positions of the k highest scores, best first, equal scores in position order.
+    
+    Selects with a linear-time partition and only sorts the k winners.
+    """
+    scores = np.asarray(scores)
+    if k <= 0 or not len(scores):
+        return np.array([], dtype=np.intp)
+    if k < len(scores):
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        positions = np.concatenate([above, ties])
+    else:
+        positions = np.arange(len(scores))
+    return positions[np.lexsort((positions, -scores[positions]))]
+
+
+# Normalized skill dictionary
+class SkillDictionary:
+    """Integer ids of lowercase skill names and the alias -> skill map.
+    
+    Aliases are resolved when skills are extracted (canonical_skills), so the
+    link tables mirror the stored JSON lists and both give the same scores.
+    
+    Loaded from the skills and skill_aliases tables for one operation; a
+    vocabulary of 50k skills takes a few MB. Unknown names are inserted
+    through the operation's cursor, so they share its transaction.
+    """
+    def __init__(self, cursor):
+        cursor.execute("SELECT id, name FROM skills")
+        self.ids = {name: skill_id for skill_id, name in cursor.fetchall()}
+        self.names = {skill_id: name for name, skill_id in self.ids.items()}
+        cursor.execute("""
+        SELECT a.alias, s.name
+        FROM skill_aliases a
+        JOIN skills s ON s.id = a.skill_id
+        """)
+        self.aliases = dict(cursor.fetchall())
+    
+    def skill_id(self, cursor, skill):
+        """Id of a skill name, added to the dictionary when it is new"""
+        name = skill.lower()
+        skill_id = self.ids.get(name)
+        if skill_id is None:
+            # Another process may have added it since the dictionary was loaded
+            cursor.execute("INSERT OR IGNORE INTO skills (name) VALUES (?)", (name,))
+            cursor.execute("SELECT id FROM skills WHERE name = ?", (name,))
+            skill_id = cursor.fetchone()[0]
+            self.ids[name] = skill_id
+            self.names[skill_id] = name
+        return skill_id
+    
+    def add_aliases(self, cursor, aliases):
+        """Store alias -> skill pairs that are new or point to another skill"""
+        for alias, skill in aliases.items():
+            alias = alias.lower()
+            skill_id = self.skill_id(cursor, skill)
+            if self.aliases.get(alias) != self.names[skill_id]:
+                cursor.execute("""
+                INSERT INTO skill_aliases (alias, skill_id) VALUES (?, ?)
+                ON CONFLICT (alias) DO UPDATE SET skill_id = excluded.skill_id
+                """, (alias, skill_id))
+                self.aliases[alias] = self.names[skill_id]
+    
+    def link_candidate(self, cursor, candidate_id, skills):
+        """Replace the candidate_skills rows of a candidate"""
+        skill_ids = {self.skill_id(cursor, skill) for skill in skills}
+        cursor.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+        cursor.executemany("INSERT INTO candidate_skills (candidate_id, skill_id) VALUES (?, ?)",
+                           [(candidate_id, skill_id) for skill_id in skill_ids])
+    
+    def link_job(self, cursor, job_id, skills):
+        """Replace the job_skills rows of a job, counting repeated skills"""
+        occurrences = {}
+        for skill in skills:
+            skill_id = self.skill_id(cursor, skill)
+            occurrences[skill_id] = occurrences.get(skill_id, 0) + 1
+        cursor.execute("DELETE FROM job_skills WHERE job_id = ?", (job_id,))
+        cursor.executemany("INSERT INTO job_skills (job_id, skill_id, occurrences) VALUES (?, ?, ?)",
+                           [(job_id, skill_id, count) for skill_id, count in occurrences.items()])
 
 
 # Agent 4: Interview Scheduler
 class InterviewSchedulerAgent:
     def __init__(self, db_path='recruitment.db'):
         self.db_path = db_path
+        self.db = get_database(db_path)
     
+    @timed('scheduler')
     def schedule_interviews(self, job_id, days_ahead=7):
         """Schedule interviews for shortlisted candidates"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self.db.transaction() as conn:
+            return self._schedule_interviews(conn.cursor(), job_id, days_ahead)
+    
+    def _schedule_interviews(self, cursor, job_id, days_ahead):
         
         # Get job details
         cursor.execute("SELECT title FROM job_descriptions WHERE id = ?", (job_id,))
         job = cursor.fetchone()
         if not job:
             print(f"No job found with ID {job_id}")
-            conn.close()
             return False
         
         # Get shortlisted candidates who haven't been sent an interview request yet
@@ -655,8 +3333,7 @@ class InterviewSchedulerAgent:
             print(email_content)
             print("-" * 50)
         
-        conn.commit()
-        conn.close()
+        AGENT_ITEMS.inc(('scheduler', 'interviews'), len(candidates))
         return True
     
     def generate_interview_email(self, candidate_name, job_title, interview_datetime):
@@ -702,57 +3379,97 @@ MatchMind AI Recruitment
 
 # Main class to orchestrate the multi-agent system
 class JobScreeningSystem:
-    def __init__(self, db_path='recruitment.db'):
+    def __init__(self, db_path='recruitment.db', cv_workers=None, cv_timeout=60, feature_store_path=None,
+                 match_workers=None):
         self.db_path = db_path
+        self.db = get_database(db_path)
+        self.cv_workers = cv_workers  # None or 1 parses CVs in this process
+        self.cv_timeout = cv_timeout
+        self.match_workers = match_workers  # None or 1 scores jobs in this process
         self.jd_agent = JDSummarizerAgent(db_path)
         self.cv_agent = CVParsingAgent(db_path)
-        self.matcher_agent = CandidateMatcherAgent(db_path)
+        self.matcher_agent = CandidateMatcherAgent(db_path, feature_store_path)
         self.scheduler_agent = InterviewSchedulerAgent(db_path)
     
-    def initialize(self, jd_path, cv_folder_path):
-        """Initialize the system with job descriptions and CVs"""
+    @timed('system')
+    def initialize(self, jd_path, cv_folder_path, progress=None, refit_tfidf=False):
+        """Initialize the system with job descriptions and CVs
+        
+        progress(stage, done, total) is called as the work advances and may
+        raise TaskCancelled to stop it. refit_tfidf refits the JD TF-IDF model
+        on the whole CSV and re-summarizes every job description. Missing NLTK
+        data raises LookupError, it is only downloaded by `main.py setup` or run.
+        """
+        print("Checking NLTK resources...")
+        report_progress(progress, 'nltk', 0, 1)
+        setup_nltk_resources(download=False)
+        
         print("Initializing database...")
-        init_database()
+        report_progress(progress, 'database', 0, 1)
+        init_database(self.db_path)
         
         print("Loading job descriptions...")
-        self.jd_agent.load_job_descriptions(jd_path)
+        report_progress(progress, 'job_descriptions', 0, 1)
+        self.jd_agent.load_job_descriptions(jd_path, refit_tfidf=refit_tfidf)
+        report_progress(progress, 'job_descriptions', 1, 1)
         
         print("Loading and parsing CVs...")
-        self.cv_agent.load_and_parse_cvs(cv_folder_path)
+        self.cv_agent.load_and_parse_cvs(cv_folder_path, workers=self.cv_workers, timeout=self.cv_timeout,
+                                         progress=progress)
         
         print("System initialized successfully!")
     
-    def process_all_jobs(self, matching_threshold=0.8):
-        """Process all jobs and candidates"""
+    @timed('system')
+    def process_all_jobs(self, matching_threshold=0.8, progress=None, incremental=False):
+        """Process all jobs and candidates
+        
+        progress(stage, done, total) is called as the work advances and may
+        raise TaskCancelled to stop it. With incremental only the jobs and
+        candidates added or changed since the last run are matched, and only
+        the jobs that got new scores are scheduled.
+        """
         self.matcher_agent.set_threshold(matching_threshold)
+        # The whole run shortlists at this value even if the agent's threshold changes meanwhile
+        threshold = self.matcher_agent.threshold
         
-        # Get all jobs from database
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM job_descriptions")
-        jobs = cursor.fetchall()
-        conn.close()
+        if incremental:
+            session = None
+            started = time.perf_counter()
+            job_ids = self.matcher_agent.match_incremental(progress=progress, workers=self.match_workers,
+                                                           threshold=threshold)
+        else:
+            # Candidate features are loaded once for the whole run
+            session = self.matcher_agent.start_session()
+            
+            # Score all jobs against all candidates in one batch
+            print("Matching candidates to all jobs...")
+            job_ids = self.matcher_agent.match_all_jobs(progress=progress, session=session,
+                                                        workers=self.match_workers, threshold=threshold)
         
         # Process each job
-        for job in jobs:
-            job_id = job[0]
+        for done, job_id in enumerate(job_ids):
+            report_progress(progress, 'scheduling', done, len(job_ids))
             print(f"Processing job ID {job_id}...")
             
-            # Match candidates to this job
-            self.matcher_agent.match_candidates_to_job(job_id)
-            
             # Schedule interviews for shortlisted candidates
             shortlisted = self.matcher_agent.get_shortlisted_candidates(job_id)
             print(f"Found {len(shortlisted)} shortlisted candidates for job ID {job_id}")
             
             # Send interview requests
             self.scheduler_agent.schedule_interviews(job_id)
+        report_progress(progress, 'scheduling', len(job_ids), len(job_ids))
+        
+        if session is not None:
+            report = session.report()
+        else:
+            report = {'seconds': time.perf_counter() - started, 'peak_memory_mb': peak_memory_mb()}
+        peak_memory = f"{report['peak_memory_mb']:.1f} MB" if report['peak_memory_mb'] is not None else "unknown"
+        print(f"Matching run took {report['seconds']:.2f}s, peak memory {peak_memory}")
+        return report
     
     def get_match_results(self, job_id=None):
         """Get match results, optionally filtered by job ID"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self.db.connection().cursor()
         
         if job_id:
             cursor.execute("""
@@ -775,23 +3492,22 @@ class JobScreeningSystem:
             """)
         
         results = cursor.fetchall()
-        conn.close()
         
         return [dict(row) for row in results]
 
 
 # Main execution function
-def main():
+def main(incremental=False, match_workers=None, refit_tfidf=False):
     # Paths to data
     jd_path = "Dataset/job_description.csv"
     cv_folder_path = "Dataset/CVs1"
     
-    # Initialize system
-    system = JobScreeningSystem()
-    system.initialize(jd_path, cv_folder_path)
+    # Initialize system, later runs start matching from the stored candidate features
+    system = JobScreeningSystem(feature_store_path='recruitment.db.features', match_workers=match_workers)
+    system.initialize(jd_path, cv_folder_path, refit_tfidf=refit_tfidf)
     
     # Process all jobs with 75% threshold
-    system.process_all_jobs(matching_threshold=0.75)
+    system.process_all_jobs(matching_threshold=0.75, incremental=incremental)
     
     # Print some results
     print("\nMatch Results Summary:")
@@ -821,5 +3537,63 @@ def main():
                 print(f"{i+1}. {candidate['candidate_name']} (Score: {candidate['match_score']:.2f}, Interview: {candidate['interview_time']})")
 
 
+def setup():
+    """Download the NLTK data the agents need"""
+    setup_nltk_resources(download=True)
+    print("NLTK resources are installed")
+
+
+def check_stats_command(db_path, repair=False):
+    """Print the stats counters that drifted from the tables, repairing them if asked"""
+    drift = check_stats(db_path, repair)
+    for name, (stored, actual) in drift.items():
+        print(f"{name}: stored {stored}, actual {actual}")
+    if not drift:
+        print("Stats counters are consistent")
+    elif repair:
+        print("Stats counters repaired")
+    return not drift or repair
+
+
+def build_features_command(db_path, features_path):
+    """Create or refresh the memory-mapped candidate feature store of a database"""
+    started = time.perf_counter()
+    matcher = CandidateMatcherAgent(db_path, features_path)
+    features = matcher.sync_feature_store()
+    store = matcher.feature_store
+    print(f"{features_path}: {len(features.candidate_ids)} candidates at generation {store.generation}, "
+          f"{store.changed} reloaded in {time.perf_counter() - started:.2f}s")
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MatchMind AI job screening system")
+    parser.add_argument('command', nargs='?', default='run', choices=['run', 'setup', 'check-stats', 'build-features'],
+                        help="run the whole pipeline on the dataset (default), install the NLTK data, "
+                             "recount the /api/stats counters or refresh the candidate feature store")
+    parser.add_argument('--db', default='recruitment.db', help="database used by check-stats and build-features")
+    parser.add_argument('--repair', action='store_true', help="let check-stats fix the counters that drifted")
+    parser.add_argument('--features', help="feature store file of build-features (default: <db>.features)")
+    parser.add_argument('--refit-tfidf', action='store_true',
+                        help="let run refit the job description TF-IDF model and re-summarize every job")
+    parser.add_argument('--incremental', action='store_true',
+                        help="let run only match the jobs and candidates added or changed since the last run")
+    parser.add_argument('--match-workers', type=int, help="processes scoring jobs in run (default: 1)")
+    args = parser.parse_args()
+    
+    if args.command == 'setup':
+        try:
+            setup()
+        except LookupError as e:
+            parser.exit(1, f"{e}\n")
+    elif args.command == 'check-stats':
+        if not check_stats_command(args.db, args.repair):
+            parser.exit(1)
+    elif args.command == 'build-features':
+        build_features_command(args.db, args.features or f"{args.db}.features")
+    else:
+        # The CLI downloads missing NLTK data, initialize() only checks for it
+        try:
+            setup_nltk_resources(download=True)
+        except LookupError as e:
+            parser.exit(1, f"{e}\n")
+        main(args.incremental, args.match_workers, args.refit_tfidf)
\ No newline at end of file